@@ -1,126 +1,26 @@
 import streamlit as st
-import yaml
-import os
-import pandas as pd
-from pyvis.network import Network
-from collections import defaultdict
-from pathlib import Path
+
+from kb.layout import LAYOUT_MODES
+from kb.metrics import COLOUR_FIELDS, SIZE_METRICS
+from kb.profiling import page_run, stage
+from kb.render import entity_nodes, render_graph
+from kb.store import follow_updates, get_store
 
 st.set_page_config(page_title="Map of the World", layout="wide")
 st.title("Map of the World - Children's Social Care")
+with page_run("Home"):
+    # === Home page content ===
+    with st.expander("ℹ️ About...", expanded=False):
+        st.markdown("""
+        D2I project to map the data connections within the Children’s Social Care(CSC) ecosystem.
+        (in progress)
+        Inspired in part by the work within www.childrensservices.network/network.html
 
-# === Home page content ===
-with st.expander("ℹ️ About...", expanded=False):
-    st.markdown("""
-    D2I project to map the data connections within the Children’s Social Care(CSC) ecosystem.
-    (in progress)
-    Inspired in part by the work within www.childrensservices.network/network.html
-                
-    *Key aims*
-    
-    """)
-
-ROOT = Path(__file__).resolve().parents[1]
-DATA_DIR = ROOT / "data"
-RELS_DIR = DATA_DIR / "relationships"
-PARQUET_FILE = DATA_DIR / "index_data.parquet"
-GRAPH_FILE = ROOT / "relationship_graph.html"
-
-G = Network(height="700px", width="100%", directed=True, notebook=False)
-G.force_atlas_2based()
-
-# === Function to parse YAMLs and save as Parquet ===
-def load_yaml_records(folder: Path):
-    records = []
-    for subfolder in folder.iterdir():
-        if subfolder.is_dir():
-            for file in subfolder.glob("*.yaml"):
-                if file.name.startswith("0_template"):
-                    continue
-                with open(file, "r") as f:
-                    data = yaml.safe_load(f)
-                    data["filename"] = file.name
-                    data["folder"] = subfolder.name
-                    records.append(data)
-    return records
-
-def build_dataframe(records: list[dict]) -> pd.DataFrame:
-    rows = []
-    for r in records:
-        rows.append({
-            "name": r.get("name"),
-            "type": r.get("@type"),
-            "subtype": r.get("subtype", ""),
-            "tags": ', '.join(r.get("tags", [])),
-            "organisation": r.get("organisation", ""),
-            "region": r.get("region", ""),
-            "projects": ', '.join(r.get("projects", [])) if r.get("projects") else '',
-            "folder": r.get("folder"),
-            "filename": r.get("filename")
-        })
-    return pd.DataFrame(rows)
-
-# === Create Parquet if missing ===
-if not PARQUET_FILE.exists():
-    with st.spinner("Building Parquet cache from YAMLs..."):
-        records = load_yaml_records(DATA_DIR)
-        df = build_dataframe(records)
-        df.to_parquet(PARQUET_FILE, index=False)
-
-# === Load Parquet and filter to 'data to insight' ===
-df = pd.read_parquet(PARQUET_FILE)
-df_subset = df[df["name"].str.lower().str.contains("data to insight", na=False)]
-
-# === Load filtered nodes ===
-node_degrees = defaultdict(int)
-included_nodes = set()
-node_metadata = {}
-edges = []
-
-# We no longer need folder_map – the label can come from type
-for _, row in df_subset.iterrows():
-    node_id = row["filename"].replace(".yaml", "")
-    label_val = row["name"]
-    label_type = row["type"] or "Unknown"
-    included_nodes.add(node_id)
-    node_metadata[node_id] = {
-        "label": label_val,
-        "title": f"{label_type}: {label_val}",
-        "group": label_type
-    }
-
-# === Load and filter relationships ===
-for file in os.listdir(RELS_DIR):
-    if file.endswith(".yaml") and not file.startswith("0_template"):
-        with open(RELS_DIR / file) as f:
-            data = yaml.safe_load(f)
-            source = data.get("source")
-            target = data.get("target")
-            label = data.get("relationship_type", "relatesTo")
-            if source in included_nodes or target in included_nodes:
-                node_degrees[source] += 1
-                node_degrees[target] += 1
-                included_nodes.add(source)
-                included_nodes.add(target)
-                edges.append((source, target, label, data.get("description", "")))
-
-# === Render Graph ===
-if included_nodes:
-    for node_id in included_nodes:
-        meta = node_metadata.get(node_id, {
-            "label": node_id,
-            "title": node_id,
-            "group": "Unclassified"
-        })
-        degree = node_degrees.get(node_id, 1)
-        size = 10 + degree * 2
-        title = f"{meta['title']}<br>Degree: {degree}"
-        G.add_node(node_id, label=meta["label"], title=title, group=meta["group"], size=size)
+        *Key aims*
 
-    for source, target, label, desc in edges:
-        G.add_edge(source, target, label=label, title=desc)
+        """)
 
-    G.set_options("""
+    GRAPH_OPTIONS = """
     {
         "nodes": {
             "scaling": { "min": 10, "max": 30 },
@@ -150,11 +50,43 @@ if included_nodes:
             "stabilization": { "enabled": true, "iterations": 150 }
         }
     }
-    """)
+    """
+
+    # === Layout: precomputed on the server (cached per graph) unless browser physics chosen ===
+    layout_choice = st.sidebar.selectbox("Graph layout", list(LAYOUT_MODES))
+    size_by = st.sidebar.selectbox("Size nodes by", list(SIZE_METRICS))
+    colour_by = st.sidebar.selectbox("Colour nodes by", list(COLOUR_FIELDS))
+
+    # === Shared knowledge base (index kept up to date; loaded once per version per process) ===
+    with st.spinner("Updating index from YAMLs..."):
+        kb = get_store().current()
+    follow_updates(kb)
+    for path, err in kb.errors.items():
+        st.warning(f"Error reading {path}: {err}")
+
+    # === Filter to 'data to insight' ===
+    with stage("query") as info:
+        df = kb.entities
+        df_subset = df[df["name"].str.lower().str.contains("data to insight", na=False)]
+        info["rows"] = len(df_subset)
+
+    # === One hop out from the filtered nodes (adjacency index), edges among the result ===
+    with stage("graph_assembly") as info:
+        hood, _ = kb.graph.ego(df_subset["id"], depth=1)
+        included_nodes = set(hood["id"])
+        edges_df = kb.edges.select(included_nodes, how="both")
+        edges = list(edges_df[["source", "target", "relationship_type", "description"]].itertuples(index=False, name=None))
+        info.update(nodes=len(included_nodes), edges=len(edges))
+
+    # === Render Graph (kb_graph component, payload cached on nodes/edges/options) ===
+    if included_nodes:
+        # Sizes/colours come from metrics precomputed over the full graph at index build time
+        nodes = entity_nodes(kb.entities, included_nodes, SIZE_METRICS[size_by], COLOUR_FIELDS[colour_by])
+
+        graph_edges = [{"source": source, "target": target, "label": label, "title": desc}
+                       for source, target, label, desc in edges]
 
-    G.write_html(str(GRAPH_FILE), notebook=False)
-    st.markdown(f"### D2I Network View ({len(included_nodes)} nodes, {len(edges)} edges)")
-    with open(GRAPH_FILE, 'r', encoding='utf-8') as f:
-        st.components.v1.html(f.read(), height=750, scrolling=False)
-else:
-    st.warning("No matching entities found for current filters.")
+        st.markdown(f"### D2I Network View ({len(included_nodes)} nodes, {len(edges)} edges)")
+        render_graph(nodes, graph_edges, GRAPH_OPTIONS, LAYOUT_MODES[layout_choice])
+    else:
+        st.warning("No matching entities found for current filters.")
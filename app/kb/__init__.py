@@ -0,0 +1 @@
+"""Shared knowledge-base internals used by the Streamlit pages and scripts/."""
@@ -0,0 +1,102 @@
+## Level of detail for large graphs: nodes collapsed into per-cluster super-nodes
+## (by type, region or detected community) joined by weighted edges, with chosen
+## clusters expanded on demand. Every render stays within a fixed node budget.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from kb.metrics import scaled_sizes
+from kb.render import entity_nodes
+
+CLUSTER_FIELDS = {"Type": "type", "Region": "region", "Community": "community"}
+LOD_MODES = ["Auto", "Individual nodes", "Clusters"]
+DEFAULT_NODE_BUDGET = int(os.environ.get("KB_NODE_BUDGET", "300"))
+CLUSTER_PREFIX = "cluster:"
+OTHER_CLUSTER = "Other"
+
+
+def cluster_labels(entities: pd.DataFrame, field: str) -> pd.Series:
+    """Cluster label per entity row ("Unknown" for blanks)"""
+    values = entities[field]
+    if field == "community":
+        return "Community " + values.astype(str)
+    return values.astype(object).fillna("").astype(str).str.strip().replace("", "Unknown")
+
+
+def fold_clusters(labels: pd.Series, budget: int, keep=()) -> pd.Series:
+    """labels with all but the largest budget - 1 clusters (those in keep first) folded
+    into one "Other (n clusters)" label, so there are never more clusters than budget"""
+    sizes = labels.value_counts()
+    if len(sizes) <= budget:
+        return labels
+    keep = set(keep)
+    order = sorted(sizes.index, key=lambda label: (label not in keep, -sizes[label], label))
+    kept = order[:max(budget - 1, 0)]
+    return labels.where(labels.isin(kept), f"{OTHER_CLUSTER} ({len(sizes) - len(kept)} clusters)")
+
+
+def top_nodes(entities: pd.DataFrame, budget: int, size_metric: str = "degree") -> pd.DataFrame:
+    """The budget highest-ranked rows by size_metric (ties by id), for plain renders over budget"""
+    if len(entities) <= budget:
+        return entities
+    return entities.sort_values([size_metric, "id"], ascending=[False, True], kind="stable").head(budget)
+
+
+def cluster_graph(entities: pd.DataFrame, edges: pd.DataFrame, field: str, expanded=(),
+                  budget: int = DEFAULT_NODE_BUDGET, size_metric: str = "degree",
+                  colour_field: str = "type"):
+    """(nodes, edges, hidden) for render_graph with entities collapsed by field.
+
+    With more clusters than the budget, the smallest are folded into one "Other"
+    super-node. Members of expanded clusters are drawn individually (highest
+    size_metric first) while the budget allows; the rest of each cluster stays in its
+    super-node. Edges between drawn nodes are merged per endpoint pair and weighted
+    by count.
+    """
+    entities = entities.drop_duplicates("id")
+    expanded = set(expanded)
+    raw = cluster_labels(entities, field)
+    # Up to half the budget is kept for expanded members, the rest caps the super-nodes
+    reserve = min(int(raw.isin(expanded).sum()), budget // 2)
+    labels = fold_clusters(raw, budget - reserve, keep=expanded)
+    folded = set(labels.unique()) - set(raw.unique())
+
+    # Budget: one slot per cluster super-node, the remainder for expanded members
+    candidates = entities[labels.isin(expanded).to_numpy()]
+    slots = max(budget - labels.nunique(), 0)
+    shown = top_nodes(candidates, slots, size_metric)
+    individual = set(shown["id"])
+    hidden = len(candidates) - len(shown)
+
+    rep = pd.Series(CLUSTER_PREFIX + labels.to_numpy(), index=entities["id"].to_numpy())
+    rep[list(individual)] = list(individual)
+
+    nodes = entity_nodes(entities, individual, size_metric, colour_field)
+    collapsed = labels[~entities["id"].isin(individual).to_numpy()]
+    counts = collapsed.value_counts().sort_index()
+    sizes = scaled_sizes(np.log1p(counts), lo=20, hi=60)
+    for label, count in counts.items():
+        more = "more " if label in expanded else ""
+        hint = ("Small clusters, folded to stay within the node budget: expand one from the sidebar"
+                if label in folded else "Expand it from the sidebar")
+        nodes.append({"id": CLUSTER_PREFIX + label, "label": f"{label} ({count} {more}entities)",
+                      "title": f"{count} {more}entities in cluster {label}<br>{hint}",
+                      "group": label, "size": round(float(sizes[label]), 2), "shape": "diamond"})
+
+    ends = pd.DataFrame({"source": edges["source"].map(rep), "target": edges["target"].map(rep),
+                         "relationship_type": edges["relationship_type"].fillna(""),
+                         "description": edges["description"].fillna("")}).dropna(subset=["source", "target"])
+    ends = ends[ends["source"] != ends["target"]]
+    graph_edges = []
+    for (source, target), group in ends.groupby(["source", "target"], sort=True):
+        if len(group) == 1:
+            row = group.iloc[0]
+            graph_edges.append({"source": source, "target": target,
+                                "label": row["relationship_type"], "title": row["description"]})
+        else:
+            types = ", ".join(sorted(set(group["relationship_type"]) - {""})) or "relationships"
+            graph_edges.append({"source": source, "target": target, "label": str(len(group)),
+                                "title": f"{len(group)} × {types}", "value": len(group)})
+    return nodes, graph_edges, hidden
@@ -0,0 +1,37 @@
+## Edge table helpers: relationships compiled by index_builder into edges.parquet
+
+import pandas as pd
+
+from kb.paths import EDGES_FILE
+
+
+def node_ids(df: pd.DataFrame) -> pd.Series:
+    """Graph node id for each entity row (filename without .yaml)"""
+    return df["filename"].str.replace(r"\.yaml$", "", regex=True)
+
+
+def select_edges(edges: pd.DataFrame, nodes, how: str = "both") -> pd.DataFrame:
+    """Vectorised join of the edge table against a node set.
+
+    how="both": both endpoints in nodes (induced subgraph)
+    how="any":  at least one endpoint in nodes (one hop out)
+    """
+    nodes = pd.Index(nodes).unique()
+    src_in = edges["source"].isin(nodes)
+    tgt_in = edges["target"].isin(nodes)
+    mask = (src_in & tgt_in) if how == "both" else (src_in | tgt_in)
+    return edges[mask]
+
+
+class EdgeIndex:
+    """Edge table of one index version, selected by node set"""
+
+    def __init__(self, edges: pd.DataFrame):
+        self.edges = edges.reset_index(drop=True)
+
+    @classmethod
+    def load(cls, path=EDGES_FILE) -> "EdgeIndex":
+        return cls(pd.read_parquet(path))
+
+    def select(self, nodes, how: str = "both") -> pd.DataFrame:
+        return select_edges(self.edges, nodes, how)
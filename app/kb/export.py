@@ -0,0 +1,115 @@
+## Exports: generated on demand, written in chunks, cached on disk per index version
+## (and per filter set for filtered exports), so reruns never re-serialise the index.
+## Pruned by age, not by version: a session still on an older index version may be
+## about to serve its file, so only exports nobody has asked for in a while go.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from kb.paths import EXPORT_DIR
+
+# label → (file extension, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+CHUNK_ROWS = 50_000
+# Exports unused for this long are removed (any version)
+EXPORT_MAX_AGE = 30 * 60
+# Past this many files, the least recently used go, but never one used in the last minutes
+MAX_CACHED_EXPORTS = 32
+EXPORT_MIN_AGE = 5 * 60
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _path_lock(path: Path) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(str(path), threading.Lock())
+
+
+def _join_lists(df: pd.DataFrame) -> pd.DataFrame:
+    """Arrow list columns (tags, projects) as comma-joined strings, as CSV has always had them"""
+    lists = [c for c, dtype in df.dtypes.items()
+             if isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype)]
+    if not lists:
+        return df
+    return df.assign(**{c: pd.Series(pc.binary_join(pa.array(df[c]), ", ").fill_null(""),
+                                     index=df.index, dtype=str) for c in lists})
+
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    """CSV as a stream of encoded chunks (header only on the first)"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = _join_lists(df.iloc[start:start + chunk_rows])
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def write_export(df: pd.DataFrame, path: Path, fmt: str, chunk_rows: int = CHUNK_ROWS):
+    """Write df as CSV/Parquet chunk by chunk, atomically"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if fmt == "CSV":
+        with open(tmp, "wb") as f:
+            for chunk in iter_csv_chunks(df, chunk_rows):
+                f.write(chunk)
+    else:
+        # No pandas metadata, so pd.read_parquet (and other readers) open the list columns
+        schema = pa.Schema.from_pandas(df, preserve_index=False).remove_metadata()
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for start in range(0, len(df), chunk_rows):
+                writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunk_rows],
+                                                        schema=schema, preserve_index=False))
+    os.replace(tmp, path)
+
+
+def export_name(version: str, fmt: str, filters: dict = None) -> str:
+    ext = EXPORT_FORMATS[fmt][0]
+    if not filters:
+        return f"index_data-{version}.{ext}"
+    digest = hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:12]
+    return f"index_data-{version}-{digest}.{ext}"
+
+
+def _prune(export_dir: Path):
+    """Drop exports unused for EXPORT_MAX_AGE, and the least recently used past
+    MAX_CACHED_EXPORTS once they are EXPORT_MIN_AGE old (mtime = last use)"""
+    now = time.time()
+    files = []
+    for p in export_dir.glob("index_data-*"):
+        try:
+            files.append((p.stat().st_mtime, p))
+        except OSError:  # removed by another worker meanwhile
+            continue
+    files.sort(key=lambda item: item[0], reverse=True)
+    for i, (mtime, p) in enumerate(files):
+        age = now - mtime
+        if age > EXPORT_MAX_AGE or (i >= MAX_CACHED_EXPORTS and age > EXPORT_MIN_AGE):
+            p.unlink(missing_ok=True)
+
+
+def export_file(load_frame, version: str, fmt: str = "CSV", filters: dict = None,
+                export_dir: Path = EXPORT_DIR) -> Path:
+    """Path to the export for this index version/filter set, building it on first use.
+
+    load_frame is only called on a cache miss, so unchanged exports cost a stat().
+    A hit refreshes the file's mtime, so pruning sees it as just used.
+    """
+    export_dir.mkdir(parents=True, exist_ok=True)
+    path = export_dir / export_name(version, fmt, filters)
+    with _path_lock(path):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            write_export(load_frame(), path, fmt)
+            _prune(export_dir)
+    return path
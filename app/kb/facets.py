@@ -0,0 +1,91 @@
+## Faceted navigation: a value → row bitmap index per facet column, built at index
+## time and stored in the snapshot, so the sidebar offers the values that exist with
+## their counts. Within a facet, selected values are OR-ed; across facets, AND-ed.
+## A facet's counts are taken over the rows matching every *other* facet (and the
+## search), so selecting a value never zeroes its siblings. With nothing else
+## selected, the counts are the precomputed totals; otherwise they are popcounts
+## of the cached per-value bitmaps, with no scan over the frame.
+
+import numpy as np
+import pandas as pd
+
+from kb.tags import TagIndex
+
+# Set bits per byte value (np.bitwise_count needs NumPy 2)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# sidebar label → entity column
+FACETS = {
+    "Entity Type": "folder",
+    "Type": "type",
+    "Subtype": "subtype",
+    "Region": "region",
+    "Tag": "tags",
+}
+
+
+class FacetIndex:
+    """One TagIndex per facet column over the same entity rows"""
+
+    def __init__(self, indexes: dict, entities: pd.DataFrame):
+        self.indexes = indexes
+        self.n = len(entities)
+        self.file_paths = pd.Index(entities["file_path"])
+        self.all_rows = np.packbits(np.ones(self.n, dtype=bool))
+
+    @classmethod
+    def build(cls, entities: pd.DataFrame) -> "FacetIndex":
+        """Index every facet column"""
+        return cls({column: TagIndex(entities, column) for column in FACETS.values()}, entities)
+
+    def to_arrays(self) -> dict:
+        return {f"{column}.{name}": values for column, index in self.indexes.items()
+                for name, values in index.to_arrays().items()}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, entities: pd.DataFrame) -> "FacetIndex":
+        """Rebuild from to_arrays() output ("<column>.<array>" keys) without recomputing"""
+        parts = {column: {} for column in FACETS.values()}
+        for name, values in arrays.items():
+            column, array = name.split(".", 1)
+            parts[column][array] = values
+        return cls({column: TagIndex.from_arrays(part, entities) for column, part in parts.items()}, entities)
+
+    def positions(self, file_paths) -> np.ndarray:
+        """Row positions of the given files, in the given order (unknown files dropped)"""
+        pos = self.file_paths.get_indexer(pd.Index(list(file_paths), dtype=object))
+        return pos[pos >= 0]
+
+    def bitmap(self, selected: dict, skip: str = None, base: np.ndarray = None) -> np.ndarray:
+        """Rows matching every facet selection (except skip) and base, as a packed bitmap"""
+        bitmap = self.all_rows if base is None else base
+        for column, chosen in selected.items():
+            if column == skip or not chosen or column not in self.indexes:
+                continue
+            index = self.indexes[column]
+            ids = [i for i in map(index.tag_id, chosen) if i >= 0]
+            bitmap = bitmap & index.bitmap(ids)
+        return bitmap
+
+    def row_bitmap(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def counts(self, column: str, selected: dict, base: np.ndarray = None) -> pd.Series:
+        """value → matching rows for one facet, under the other facets' selections"""
+        index = self.indexes[column]
+        if base is None and not any(chosen for c, chosen in selected.items() if c != column):
+            counts = index.counts
+        else:
+            others = self.bitmap(selected, skip=column, base=base)
+            counts = _POPCOUNT[index.bitmaps & others].sum(axis=1, dtype=np.int64)
+        return pd.Series(counts, index=index.tags, dtype=np.int64)
+
+    def rows(self, selected: dict, search_rows: np.ndarray = None) -> np.ndarray:
+        """Matching row positions: in search_rows order when given (best first), else row order"""
+        bitmap = self.bitmap(selected)
+        if search_rows is None:
+            return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+        keep = np.unpackbits(bitmap, count=self.n).astype(bool)
+        return search_rows[keep[search_rows]]
@@ -0,0 +1,89 @@
+// Streamlit component for the knowledge-base graph: one vis.Network per iframe,
+// fed node/edge JSON on every render (no per-render HTML documents), either the
+// whole graph or add/update/remove ops against the revision it already shows.
+
+const container = document.getElementById("graph");
+const nodes = new vis.DataSet();
+const edges = new vis.DataSet();
+let network = null;
+let lastData = null;
+let rev = null;
+let lastHeight = null;
+
+function send(type, data) {
+  window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), "*");
+}
+
+// vis-network shows string titles as plain text; ours carry <br> line breaks.
+// Titles hold YAML-derived text, so build the element from text nodes and
+// <br> elements only (never innerHTML): any other markup stays literal text.
+function withHtmlTitle(item) {
+  if (typeof item.title === "string" && item.title.indexOf("<br>") >= 0) {
+    const el = document.createElement("div");
+    item.title.split("<br>").forEach(function (line, i) {
+      if (i > 0) {
+        el.appendChild(document.createElement("br"));
+      }
+      el.appendChild(document.createTextNode(line));
+    });
+    return Object.assign({}, item, { title: el });
+  }
+  return item;
+}
+
+function showGraph(graph) {
+  if (network === null) {
+    network = new vis.Network(container, { nodes: nodes, edges: edges }, graph.options);
+  } else {
+    network.setOptions(graph.options);
+  }
+  nodes.clear();
+  edges.clear();
+  nodes.add(graph.nodes.map(withHtmlTitle));
+  edges.add(graph.edges.map(withHtmlTitle));
+  network.fit();
+}
+
+// Incremental ops from the server: only what changed, view and positions untouched
+function applyOps(data, ops) {
+  data.remove(ops.remove);
+  data.update(ops.update.map(withHtmlTitle));
+  data.add(ops.add.map(withHtmlTitle));
+}
+
+function render(args) {
+  const height = args.height || 700;
+  if (height !== lastHeight) {
+    container.style.height = height + "px";
+    send("streamlit:setFrameHeight", { height: height + 2 });
+    lastHeight = height;
+  }
+  if (args.data === lastData) {
+    return;
+  }
+  lastData = args.data;
+  const message = JSON.parse(args.data);
+  if (message.full) {
+    showGraph(message.graph);
+    rev = message.rev;
+  } else if (network !== null && message.base === rev) {
+    if (message.options) {
+      network.setOptions(message.options);
+    }
+    applyOps(edges, { remove: message.edges.remove, update: [], add: [] });
+    applyOps(nodes, message.nodes);
+    applyOps(edges, { remove: [], update: message.edges.update, add: message.edges.add });
+    rev = message.rev;
+  } else {
+    // Ops against a revision we never saw (e.g. this iframe was just created): ask for everything
+    send("streamlit:setComponentValue", { value: { resync: Date.now() + "-" + Math.random() }, dataType: "json" });
+  }
+}
+
+window.addEventListener("message", function (event) {
+  if (event.data && event.data.type === "streamlit:render") {
+    render(event.data.args);
+  }
+});
+
+send("streamlit:componentReady", { apiVersion: 1 });
@@ -0,0 +1,133 @@
+## Graph queries for exploring the relationship graph: k-hop neighbourhoods,
+## shortest paths and project membership over an undirected CSR adjacency index
+## built once per index version. Results are capped so a render stays bounded.
+
+import numpy as np
+import pandas as pd
+
+from kb.metrics import CSRGraph
+
+MAX_DEPTH = 4
+DEFAULT_NODE_LIMIT = 250
+
+
+def _project_key(value: str) -> str:
+    """Project refs are written both as 'standard-safeguarding-dataset' and with underscores"""
+    return value.strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def _empty_hops() -> pd.DataFrame:
+    return pd.DataFrame({"id": pd.Series(dtype=str), "hops": pd.Series(dtype=int)})
+
+
+def _project_members(entities: pd.DataFrame) -> dict:
+    """project key → ids of entities listing it under `projects`"""
+    projects = pd.DataFrame({"id": entities["id"].to_numpy(), "project": entities["projects"]})
+    projects = projects.explode("project").dropna()
+    projects = projects[projects["project"].str.strip() != ""]
+    return projects.groupby(projects["project"].map(_project_key))["id"].apply(list).to_dict()
+
+
+def _adjacency(entities: pd.DataFrame, edges: pd.DataFrame):
+    """(node ids, undirected CSR adjacency) over entity ids plus edge endpoints without a YAML"""
+    ids = pd.Index(entities["id"]).append(pd.Index(edges["source"])).append(pd.Index(edges["target"]))
+    ids = ids[ids.notna()].unique()
+    return ids, CSRGraph.from_edges(ids, edges["source"], edges["target"]).undirected()
+
+
+class GraphIndex:
+    """Undirected adjacency over entity ids plus any edge endpoints without a YAML"""
+
+    def __init__(self, entities: pd.DataFrame, edges: pd.DataFrame):
+        self.ids, self.adjacency = _adjacency(entities, edges)
+        self.degree = self.adjacency.out_degree()
+        self.project_members = _project_members(entities)
+
+    def to_arrays(self) -> dict:
+        return {"ids": self.ids.to_numpy(), "indptr": self.adjacency.indptr, "indices": self.adjacency.indices}
+
+    @staticmethod
+    def graph_arrays(entities: pd.DataFrame, edges: pd.DataFrame) -> dict:
+        """to_arrays() output without building the rest of the index (project members)"""
+        ids, adjacency = _adjacency(entities, edges)
+        return {"ids": ids.to_numpy(), "indptr": adjacency.indptr, "indices": adjacency.indices}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, entities: pd.DataFrame) -> "GraphIndex":
+        """Rebuild from to_arrays() output without recomputing the adjacency (e.g. snapshot views)"""
+        index = cls.__new__(cls)
+        index.ids = pd.Index(arrays["ids"], dtype=str)
+        index.adjacency = CSRGraph.from_csr(arrays["indptr"], arrays["indices"])
+        index.degree = index.adjacency.out_degree()
+        index.project_members = _project_members(entities)
+        return index
+
+    def positions(self, node_ids) -> np.ndarray:
+        pos = self.ids.get_indexer(pd.Index(list(node_ids)))
+        return np.unique(pos[pos >= 0])
+
+    def _bfs(self, seeds: np.ndarray, depth: int, limit: int):
+        """(positions, hops, truncated): level-by-level BFS, highest-degree nodes kept at the cap"""
+        hops = np.full(self.adjacency.n, -1)
+        hops[seeds] = 0
+        frontier, found, truncated = seeds, [seeds], False
+        total = len(seeds)
+        for level in range(1, depth + 1):
+            if not len(frontier):
+                break
+            _, v = self.adjacency.neighbours(frontier)
+            fresh = np.unique(v[hops[v] < 0])
+            if total + len(fresh) > limit:
+                keep = np.argsort(-self.degree[fresh], kind="stable")[:max(limit - total, 0)]
+                fresh, truncated = np.sort(fresh[keep]), True
+            hops[fresh] = level
+            found.append(fresh)
+            total += len(fresh)
+            frontier = fresh
+            if truncated:
+                break
+        positions = np.concatenate(found)
+        return positions, hops[positions], truncated
+
+    def _hops_frame(self, positions: np.ndarray, hops: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({"id": self.ids[positions], "hops": hops})
+
+    def ego(self, node_ids, depth: int = 1, limit: int = DEFAULT_NODE_LIMIT):
+        """(DataFrame[id, hops], truncated) for everything within depth hops of node_ids"""
+        seeds = self.positions(node_ids)[:limit]
+        if not len(seeds):
+            return _empty_hops(), False
+        positions, hops, truncated = self._bfs(seeds, min(depth, MAX_DEPTH), limit)
+        return self._hops_frame(positions, hops), truncated
+
+    def shortest_path(self, source: str, target: str) -> list:
+        """Node ids on one shortest (undirected) path from source to target, [] if unconnected"""
+        src, dst = self.ids.get_indexer([source, target])
+        if src < 0 or dst < 0:
+            return []
+        parent = np.full(self.adjacency.n, -1)
+        parent[src] = src
+        frontier = np.array([src])
+        while len(frontier) and parent[dst] < 0:
+            u, v = self.adjacency.neighbours(frontier)
+            new = parent[v] < 0
+            u, v = u[new], v[new]
+            v, first = np.unique(v, return_index=True)
+            parent[v] = u[first]
+            frontier = v
+        if parent[dst] < 0:
+            return []
+        path = [dst]
+        while path[-1] != src:
+            path.append(parent[path[-1]])
+        return list(self.ids[path[::-1]])
+
+    def project(self, project: str, depth: int = 0, limit: int = DEFAULT_NODE_LIMIT):
+        """(DataFrame[id, hops], truncated): the project's own node (if any), entities listing
+        it, and optionally their neighbourhood up to depth hops"""
+        key = _project_key(project)
+        # Entity ids are file stems, so a project with its own YAML matches on the key
+        return self.ego([key] + self.project_members.get(key, []), depth, limit)
+
+    def projects(self) -> list:
+        return sorted(self.project_members)
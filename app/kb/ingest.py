@@ -0,0 +1,70 @@
+## YAML ingestion: libyaml C loader when available, chunked process pool for big trees
+## Per-file errors are collected and returned, never raised mid-batch.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+# Below this many files the pool start-up costs more than it saves
+PARALLEL_MIN_FILES = 200
+DEFAULT_CHUNKSIZE = 64
+
+
+def default_workers() -> int:
+    """Worker count from KB_INGEST_WORKERS, else one per core"""
+    env = os.environ.get("KB_INGEST_WORKERS")
+    if env:
+        return max(1, int(env))
+    return os.cpu_count() or 1
+
+
+def load_yaml(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=SafeLoader)
+    if not isinstance(data, dict):
+        raise ValueError("top level of YAML file is not a mapping")
+    return data
+
+
+def _parse_chunk(chunk: list) -> list:
+    out = []
+    for key, path in chunk:
+        try:
+            out.append((key, load_yaml(path), None))
+        except Exception as e:
+            out.append((key, None, f"{type(e).__name__}: {e}"))
+    return out
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def parse_files(files: dict, workers: int = None, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Parse {key: path} → ({key: data}, {key: error message})"""
+    items = [(key, str(Path(path))) for key, path in files.items()]
+    workers = default_workers() if workers is None else max(1, workers)
+
+    if workers == 1 or len(items) < PARALLEL_MIN_FILES:
+        results = _parse_chunk(items)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_result in pool.map(_parse_chunk, _chunks(items, chunksize)):
+                results.extend(chunk_result)
+
+    records, errors = {}, {}
+    for key, data, err in results:
+        if err is None:
+            records[key] = data
+        else:
+            errors[key] = err
+    return records, errors
@@ -0,0 +1,125 @@
+## Server-side graph layout: NumPy Fruchterman–Reingold, computed once per graph
+## Positions are cached by graph content hash and shipped to vis.js as fixed x/y,
+## so viewers' browsers skip forceAtlas2 stabilisation.
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Ideal edge length in vis.js pixels (matches the forceAtlas2 springLength in use)
+SPRING_LENGTH = 100
+GRAVITY = 0.05
+DEFAULT_ITERATIONS = 150
+MIN_ITERATIONS = 30
+# Pairwise repulsion evaluations allowed per layout: big graphs get fewer iterations
+PAIR_BUDGET = DEFAULT_ITERATIONS * 300 ** 2
+# Iterations vis.js gets to polish a precomputed layout in "relax" mode
+RELAX_ITERATIONS = 25
+# Rows per repulsion block: bounds the pairwise arrays to BLOCK × n
+BLOCK = 512
+CACHE_SIZE = 64
+
+LAYOUT_MODES = {
+    "Precomputed (static)": "static",
+    "Precomputed + light relax": "relax",
+    "Browser (forceAtlas2)": "browser",
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def graph_hash(node_ids, edges) -> str:
+    payload = json.dumps([sorted(map(str, node_ids)), sorted([str(s), str(t)] for s, t in edges)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compute_layout(node_ids, edges, iterations: int = None, seed: int = 0) -> dict:
+    """node id → (x, y); vectorised over all nodes per iteration"""
+    node_ids = list(node_ids)
+    n = len(node_ids)
+    if n == 0:
+        return {}
+    if iterations is None:
+        iterations = int(np.clip(PAIR_BUDGET // (n * n), MIN_ITERATIONS, DEFAULT_ITERATIONS))
+    index = {nid: i for i, nid in enumerate(node_ids)}
+    e = np.array([(index[s], index[t]) for s, t in edges
+                  if s in index and t in index and s != t], dtype=np.int64).reshape(-1, 2)
+
+    rng = np.random.default_rng(seed)
+    side = SPRING_LENGTH * np.sqrt(n)
+    x, y = rng.uniform(-side / 2, side / 2, size=(2, n)).astype(np.float32)
+    k2 = np.float32(SPRING_LENGTH ** 2)
+    temp = side / 10
+    cool = temp / (iterations + 1)
+
+    src, tgt = e[:, 0], e[:, 1]
+    for _ in range(iterations):
+        # Repulsion k²/d between every pair, in row blocks
+        dx_sum = np.empty(n, dtype=np.float32)
+        dy_sum = np.empty(n, dtype=np.float32)
+        for start in range(0, n, BLOCK):
+            stop = start + BLOCK
+            dx = x[start:stop, None] - x[None, :]
+            dy = y[start:stop, None] - y[None, :]
+            w = k2 / np.maximum(dx * dx + dy * dy, 1e-2)
+            dx_sum[start:stop] = (dx * w).sum(1)
+            dy_sum[start:stop] = (dy * w).sum(1)
+
+        # Attraction d²/k along edges
+        if len(e):
+            ex = x[src] - x[tgt]
+            ey = y[src] - y[tgt]
+            el = np.sqrt(ex * ex + ey * ey) / SPRING_LENGTH
+            dx_sum += (np.bincount(tgt, ex * el, n) - np.bincount(src, ex * el, n)).astype(np.float32)
+            dy_sum += (np.bincount(tgt, ey * el, n) - np.bincount(src, ey * el, n)).astype(np.float32)
+
+        # Gravity keeps disconnected components on screen
+        dx_sum -= GRAVITY * x
+        dy_sum -= GRAVITY * y
+
+        length = np.maximum(np.sqrt(dx_sum * dx_sum + dy_sum * dy_sum), 1e-9)
+        step = np.minimum(length, np.float32(temp)) / length
+        x += dx_sum * step
+        y += dy_sum * step
+        temp -= cool
+
+    pos = np.column_stack([x, y])
+    pos -= pos.mean(axis=0)
+    return {nid: (float(x), float(y)) for nid, (x, y) in zip(node_ids, pos)}
+
+
+def cached_layout(node_ids, edges) -> dict:
+    """compute_layout memoised (LRU) on the graph's content hash"""
+    key = graph_hash(node_ids, edges)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    # Sorted input + hash-derived seed: identical graphs get identical layouts
+    positions = compute_layout(sorted(node_ids, key=str), edges, seed=int(key[:8], 16))
+    with _cache_lock:
+        _cache[key] = positions
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return positions
+
+
+def apply_layout(nodes: list, edges: list, options: dict, mode: str = "static"):
+    """Pin vis node dicts to the cached layout and tone down client physics in options.
+
+    nodes carry "id", edges "from"/"to"; mode is a LAYOUT_MODES value.
+    """
+    if mode == "browser" or not nodes:
+        return
+    positions = cached_layout([n["id"] for n in nodes], [(e["from"], e["to"]) for e in edges])
+    for node in nodes:
+        node["x"], node["y"] = positions[node["id"]]
+
+    relax = mode == "relax"
+    physics = options.setdefault("physics", {})
+    physics["enabled"] = relax
+    physics.setdefault("stabilization", {}).update({"enabled": relax, "iterations": RELAX_ITERATIONS})
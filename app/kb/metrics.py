@@ -0,0 +1,211 @@
+## Graph analytics pass, run at index build time over the full relationship graph
+## CSR adjacency in NumPy arrays; results land as columns on the entity index so
+## pages size/colour/sort nodes without touching the graph per request.
+
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = [
+    "in_degree", "out_degree", "degree", "component", "component_size", "community", "pagerank",
+    "betweenness",
+]
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOL = 1e-10
+PAGERANK_MAX_ITER = 100
+COMMUNITY_MAX_ITER = 20
+# Brandes from every node up to this size, from a fixed sample of sources above it
+BETWEENNESS_MAX_SOURCES = 256
+
+# Sidebar label → entity index column
+SIZE_METRICS = {"Degree": "degree", "PageRank": "pagerank", "Betweenness": "betweenness"}
+COLOUR_FIELDS = {"Type": "type", "Component": "component", "Community": "community", "Region": "region"}
+SORT_METRICS = {"Relevance": None, "Degree": "degree", "PageRank": "pagerank", "Betweenness": "betweenness"}
+
+
+class CSRGraph:
+    """Directed graph as compressed sparse rows: neighbours of i are indices[indptr[i]:indptr[i+1]]"""
+
+    def __init__(self, n: int, src: np.ndarray, dst: np.ndarray):
+        self.n = n
+        order = np.argsort(src, kind="stable")
+        self.src = src[order]
+        self.indices = dst[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+
+    @classmethod
+    def from_edges(cls, node_ids, sources, targets) -> "CSRGraph":
+        index = pd.Index(node_ids)
+        src = index.get_indexer(sources)
+        dst = index.get_indexer(targets)
+        keep = (src >= 0) & (dst >= 0) & (src != dst)
+        return cls(len(index), src[keep].astype(np.int64), dst[keep].astype(np.int64))
+
+    @classmethod
+    def from_csr(cls, indptr: np.ndarray, indices: np.ndarray) -> "CSRGraph":
+        """Wrap existing CSR arrays (already sorted by source) without copying them"""
+        graph = cls.__new__(cls)
+        graph.n = len(indptr) - 1
+        graph.indptr, graph.indices = indptr, indices
+        graph.src = np.repeat(np.arange(graph.n), np.diff(indptr))
+        return graph
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.n)
+
+    def undirected(self) -> "CSRGraph":
+        keys = np.unique(np.concatenate([self.src * self.n + self.indices, self.indices * self.n + self.src]))
+        src, dst = np.divmod(keys, self.n)
+        return CSRGraph(self.n, src, dst)
+
+    def neighbours(self, frontier: np.ndarray):
+        """(u, v) pairs for every edge leaving the frontier, without a Python loop"""
+        starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+        counts = ends - starts
+        u = np.repeat(frontier, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return u, self.indices[np.repeat(starts, counts) + offsets]
+
+
+def connected_components(g: CSRGraph) -> np.ndarray:
+    """Weak components by min-label propagation over the undirected edges"""
+    labels = np.arange(g.n)
+    src = np.concatenate([g.src, g.indices])
+    dst = np.concatenate([g.indices, g.src])
+    while True:
+        new = labels.copy()
+        np.minimum.at(new, dst, labels[src])
+        new = new[new]  # pointer jumping: collapses long chains quickly
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    return _rank_labels(labels)
+
+
+def _rank_labels(labels: np.ndarray) -> np.ndarray:
+    """Renumber labels 0..k-1, largest group first"""
+    uniq, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(uniq), dtype=np.int64)
+    rank[np.lexsort((uniq, -counts))] = np.arange(len(uniq))
+    return rank[inverse]
+
+
+def communities(g: CSRGraph, max_iter: int = COMMUNITY_MAX_ITER) -> np.ndarray:
+    """Communities by label propagation: each node takes its neighbours' most common label.
+
+    Synchronous and deterministic (ties go to the smallest label, a node's own label
+    counts once so isolated pairs settle); stops when stable or after max_iter rounds.
+    """
+    labels = np.arange(g.n)
+    if g.n == 0:
+        return labels
+    ug = g.undirected()
+    src = np.concatenate([ug.src, labels])
+    dst = np.concatenate([ug.indices, labels])
+    for _ in range(max_iter):
+        keys, counts = np.unique(dst * g.n + labels[src], return_counts=True)
+        node, label = np.divmod(keys, g.n)
+        best = np.lexsort((label, -counts, node))
+        first = np.concatenate([[True], node[best[1:]] != node[best[:-1]]])
+        new = labels.copy()
+        new[node[best[first]]] = label[best[first]]
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    return _rank_labels(labels)
+
+
+def pagerank(g: CSRGraph, damping: float = PAGERANK_DAMPING) -> np.ndarray:
+    if g.n == 0:
+        return np.empty(0)
+    out_deg = g.out_degree().astype(float)
+    dangling = out_deg == 0
+    rank = np.full(g.n, 1.0 / g.n)
+    for _ in range(PAGERANK_MAX_ITER):
+        share = np.divide(rank, out_deg, out=np.zeros(g.n), where=~dangling)
+        new = np.bincount(g.indices, weights=share[g.src], minlength=g.n)
+        new = damping * (new + rank[dangling].sum() / g.n) + (1 - damping) / g.n
+        if np.abs(new - rank).sum() < PAGERANK_TOL:
+            return new
+        rank = new
+    return rank
+
+
+def betweenness(g: CSRGraph, max_sources: int = BETWEENNESS_MAX_SOURCES, seed: int = 0) -> np.ndarray:
+    """Normalised betweenness on the undirected graph (Brandes, level-synchronous BFS).
+
+    Exact up to max_sources nodes, otherwise estimated from a fixed random sample of sources.
+    """
+    n = g.n
+    bc = np.zeros(n)
+    if n < 3:
+        return bc
+    ug = g.undirected()
+    sources = np.arange(n)
+    if n > max_sources:
+        sources = np.sort(np.random.default_rng(seed).choice(n, max_sources, replace=False))
+
+    for s in sources:
+        dist = np.full(n, -1)
+        sigma = np.zeros(n)
+        dist[s], sigma[s] = 0, 1.0
+        frontier = np.array([s])
+        levels = []
+        depth = 0
+        while len(frontier):
+            u, v = ug.neighbours(frontier)
+            fresh = np.unique(v[dist[v] < 0])
+            dist[fresh] = depth + 1
+            on_path = dist[v] == depth + 1
+            u, v = u[on_path], v[on_path]
+            sigma += np.bincount(v, weights=sigma[u], minlength=n)
+            levels.append((u, v))
+            frontier = fresh
+            depth += 1
+        delta = np.zeros(n)
+        for u, v in reversed(levels):
+            delta += np.bincount(u, weights=sigma[u] / sigma[v] * (1 + delta[v]), minlength=n)
+        delta[s] = 0
+        bc += delta
+
+    bc *= n / len(sources)
+    # Each undirected pair is counted from both ends
+    return bc / ((n - 1) * (n - 2))
+
+
+def graph_metrics(node_ids, edges: pd.DataFrame) -> pd.DataFrame:
+    """METRIC_COLUMNS per node id, over entities plus any edge endpoints"""
+    ids = pd.Index(node_ids).append(pd.Index(edges["source"])).append(pd.Index(edges["target"]))
+    ids = ids[ids.notna()].unique()
+    g = CSRGraph.from_edges(ids, edges["source"], edges["target"])
+    in_deg, out_deg = g.in_degree(), g.out_degree()
+    component = connected_components(g)
+    return pd.DataFrame({
+        "in_degree": in_deg,
+        "out_degree": out_deg,
+        "degree": in_deg + out_deg,
+        "component": component,
+        "component_size": np.bincount(component)[component],
+        "community": communities(g),
+        "pagerank": pagerank(g),
+        "betweenness": betweenness(g),
+    }, index=ids)
+
+
+def add_graph_metrics(entities: pd.DataFrame, edges: pd.DataFrame) -> pd.DataFrame:
+    """Entity frame with METRIC_COLUMNS (re)computed over the full graph"""
+    entities = entities.drop(columns=[c for c in METRIC_COLUMNS if c in entities.columns])
+    metrics = graph_metrics(entities["id"], edges)
+    return entities.join(metrics, on="id")
+
+
+def scaled_sizes(values: pd.Series, lo: float = 10, hi: float = 40) -> pd.Series:
+    """Node sizes in [lo, hi] by min-max of the shown nodes' metric"""
+    values = values.astype(float).fillna(0)
+    span = values.max() - values.min() if len(values) else 0
+    if not span:
+        return pd.Series(lo + (hi - lo) / 4, index=values.index)
+    return lo + (values - values.min()) / span * (hi - lo)
@@ -0,0 +1,14 @@
+## Paging for result lists: only the current window of rows is ever rendered
+
+PAGE_SIZES = [10, 25, 50, 100, 500]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+def page_bounds(total: int, page: int, page_size: int) -> tuple:
+    """[start, stop) row positions for a 1-based page, clamped to the result"""
+    page = min(max(1, page), page_count(total, page_size))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total)
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+# === Path Setup ===
+ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = ROOT / "data"
+RELS_DIR = DATA_DIR / "relationships"
+PARQUET_FILE = DATA_DIR / "index_data.parquet"
+EDGES_FILE = DATA_DIR / "edges.parquet"
+RELATIONSHIP_EDGES_FILE = DATA_DIR / "relationship_edges.parquet"
+REFERENCES_FILE = DATA_DIR / "entity_references.parquet"
+UNRESOLVED_REFS_FILE = DATA_DIR / "unresolved_references.parquet"
+SEARCH_POSTINGS_FILE = DATA_DIR / "search_postings.parquet"
+SEARCH_TRIGRAMS_FILE = DATA_DIR / "search_trigrams.parquet"
+INTERVALS_FILE = DATA_DIR / "intervals.parquet"
+DUCKDB_FILE = DATA_DIR / "index.db"
+MANIFEST_FILE = DATA_DIR / "index_manifest.json"
+VALIDATION_CACHE_FILE = DATA_DIR / "validation_cache.json"
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+EXPORT_DIR = DATA_DIR / "exports"
+PROFILE_DIR = DATA_DIR / "profiles"
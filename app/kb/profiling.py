@@ -0,0 +1,220 @@
+## Per-rerun stage timings: pages run inside page_run(), library and page code wrap
+## their ingestion/query/render work in stage(); when the script ends (or is
+## interrupted) the run is logged as one JSON line (logger "kb.timing") and, in debug
+## mode, shown in a sidebar panel. An opt-in sampling profiler dumps collapsed stacks
+## per rerun.
+##
+## KB_TIMING_LOG=path   append timing lines to a file (default: stderr)
+## KB_DEBUG=1 / ?debug=1      show the sidebar panel
+## KB_PROFILE=1               sample stacks during every rerun, dump to data/profiles/
+## ?profile=1                 the same for one session, honoured only with KB_DEBUG=1
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+from kb.paths import PROFILE_DIR
+
+SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 64
+
+logger = logging.getLogger("kb.timing")
+_local = threading.local()
+# session id → its run with a live profiler, so a rerun can stop one left behind
+_profiled = {}
+_profiled_lock = threading.Lock()
+
+
+def _configure_logger():
+    if logger.handlers:
+        return
+    path = os.environ.get("KB_TIMING_LOG")
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _env_flag(env: str) -> bool:
+    return os.environ.get(env, "") not in ("", "0")
+
+
+def _flag(env: str, param: str) -> bool:
+    if _env_flag(env):
+        return True
+    try:
+        return st.query_params.get(param, "") not in ("", "0")
+    except Exception:  # outside a Streamlit script run
+        return False
+
+
+def _profiling_enabled() -> bool:
+    """KB_PROFILE=1, or ?profile=1 where debug switches are allowed (KB_DEBUG=1)"""
+    return _env_flag("KB_PROFILE") or (_env_flag("KB_DEBUG") and _flag("KB_PROFILE", "profile"))
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return getattr(ctx, "session_id", None)
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every interval; counts collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kb-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and len(names) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        """Collapsed-stack format (one 'frame;frame;frame count' per line), flamegraph-ready"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Run:
+    """Timings of one script run"""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.stages = []
+        self.profiler = None
+        self.profile_path = None
+
+    def stop_profiler(self):
+        """Stop sampling (safe to call twice); the profiler if it was running, else None"""
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.stop()
+        return profiler
+
+    def record(self, name: str, seconds: float, info: dict):
+        self.stages.append({"stage": name, "ms": round(seconds * 1000, 2), **info})
+
+    def summary(self) -> dict:
+        return {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "session": _session_id(),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": self.stages,
+            "profile": str(self.profile_path) if self.profile_path else None,
+        }
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def begin_run(page: str) -> Run:
+    """Start timing this rerun (pages use page_run(), which also ends it)"""
+    _configure_logger()
+    session = _session_id()
+    with _profiled_lock:
+        left = _profiled.pop(session, None)
+    # A run that never reached end_run (interrupted rerun) must not keep sampling
+    for stale in {left, current_run()} - {None}:
+        stale.stop_profiler()
+    run = Run(page)
+    if _profiling_enabled():
+        run.profiler = SamplingProfiler(threading.get_ident())
+        run.profiler.start()
+        with _profiled_lock:
+            _profiled[session] = run
+    _local.run = run
+    return run
+
+
+@contextmanager
+def stage(name: str, **info):
+    """Time a block as one stage of the current run (no-op outside a run).
+
+    Yields a dict for row counts etc., logged alongside the duration.
+    """
+    run = current_run()
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        if run is not None:
+            run.record(name, time.perf_counter() - started, info)
+
+
+def end_run(panel: bool = None) -> dict:
+    """Log the run, dump its profile, show the debug panel if enabled; returns the summary"""
+    run = current_run()
+    if run is None:
+        return {}
+    _local.run = None
+    with _profiled_lock:
+        for session, profiled in list(_profiled.items()):
+            if profiled is run:
+                del _profiled[session]
+    profiler = run.stop_profiler()
+    if profiler is not None:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        slug = "".join(c if c.isalnum() else "_" for c in run.page.lower())
+        run.profile_path = PROFILE_DIR / f"{slug}-{datetime.now():%Y%m%d-%H%M%S-%f}.txt"
+        profiler.dump(run.profile_path)
+
+    summary = run.summary()
+    logger.info(json.dumps(summary, default=str))
+
+    if panel if panel is not None else _flag("KB_DEBUG", "debug"):
+        with st.sidebar.expander("⏱️ Debug: rerun timings", expanded=False):
+            st.caption(f"{summary['page']}: {summary['total_ms']:.0f} ms total")
+            st.dataframe(summary["stages"], hide_index=True, use_container_width=True)
+            if summary["profile"]:
+                st.caption(f"Profile: {summary['profile']}")
+    return summary
+
+
+@contextmanager
+def page_run(page: str, panel: bool = None):
+    """Wrap a page script: begin_run on entry, end_run on exit.
+
+    Also on Streamlit's rerun/stop exceptions or an error, so the profiler is always
+    stopped and the run logged (without the panel, the script being cut short).
+    """
+    run = begin_run(page)
+    try:
+        yield run
+    except BaseException:
+        end_run(panel=False)
+        raise
+    end_run(panel)
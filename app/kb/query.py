@@ -0,0 +1,80 @@
+## Sidebar filters as parameterised DuckDB queries over data/index.db
+## One connection per process, re-attached when the builder swaps in a new index.db.
+## User input only ever travels as bound parameters — never formatted into SQL.
+
+import threading
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from kb.paths import DUCKDB_FILE
+
+_lock = threading.Lock()
+_con = None
+_con_key = None
+
+
+def _file_key(path):
+    st = path.stat()
+    return (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def connection(path=DUCKDB_FILE):
+    """Process-wide connection with the index attached read-only as `idx`.
+
+    The builder replaces index.db atomically, so a changed inode/mtime means a new
+    index: attach it in a fresh in-memory instance (duckdb.connect(path) would hand
+    back the cached, stale instance for the old file).
+    """
+    global _con, _con_key
+    key = _file_key(path)
+    with _lock:
+        if _con is None or key != _con_key:
+            con = duckdb.connect()
+            # ATTACH takes no bound parameters; the path is ours, quote it as a literal
+            literal = str(path).replace("'", "''")
+            con.execute(f"ATTACH '{literal}' AS idx (READ_ONLY)")
+            _con, _con_key = con, key
+        return _con
+
+
+def _arrow_lists(arrow_type):
+    return pd.ArrowDtype(arrow_type) if pa.types.is_list(arrow_type) else None
+
+
+def arrow_frame(table: pa.Table) -> pd.DataFrame:
+    """Arrow → pandas keeping list columns (tags, projects) as Arrow lists, not per-row arrays"""
+    # split_blocks: numeric columns stay views on the Arrow buffers (no 2-D block consolidation)
+    return table.to_pandas(types_mapper=_arrow_lists, ignore_metadata=True, split_blocks=True)
+
+
+def run_query(sql: str, params: list = None, path=DUCKDB_FILE) -> pd.DataFrame:
+    # cursor() per call: DuckDB connections aren't safe to share across script threads
+    cur = connection(path).cursor()
+    try:
+        result = cur.execute(sql, params or []).arrow()
+        # Newer DuckDB hands back a RecordBatchReader, older a Table
+        return arrow_frame(result.read_all() if hasattr(result, "read_all") else result)
+    finally:
+        cur.close()
+
+
+def _like(term: str) -> str:
+    """Substring ILIKE pattern with the user's own % / _ / \\ taken literally"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def entity_filter_sql(search: str = ""):
+    """WHERE clause + params for a plain substring search over name/tags/organisation"""
+    if not search:
+        return "TRUE", []
+    clause = ("(name ILIKE ? ESCAPE '\\' OR array_to_string(tags, ', ') ILIKE ? ESCAPE '\\' "
+              "OR organisation ILIKE ? ESCAPE '\\')")
+    return clause, [_like(search)] * 3
+
+
+def filter_entities(search: str = "", path=DUCKDB_FILE) -> pd.DataFrame:
+    where, params = entity_filter_sql(search)
+    return run_query(f"SELECT * FROM idx.index_data WHERE {where} ORDER BY file_path", params, path)
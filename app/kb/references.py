@@ -0,0 +1,79 @@
+## Implicit edges: entity fields that name other entities (lead_organisation,
+## collaborators, projects, organisation) become typed edges at index time.
+## Raw references are extracted per file (patched incrementally like any table);
+## resolution needs every entity, so it reruns in the global pass against a
+## name/slug lookup. References that match no entity are kept for reporting.
+
+import re
+
+import pandas as pd
+
+# field → (relationship_type, description); edges point from the entity holding the field
+IMPLICIT_EDGE_FIELDS = {
+    "lead_organisation": ("ledBy", "Lead organisation"),
+    "collaborators": ("hasCollaborator", "Collaborator"),
+    "projects": ("involvedIn", "Project"),
+    "organisation": ("memberOf", "Organisation"),
+}
+
+REFERENCE_COLUMNS = ["source", "field", "ref", "file_path"]
+UNRESOLVED_COLUMNS = ["source", "field", "ref", "file_path"]
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def reference_key(value) -> str:
+    """'Data to Insight', 'data-to-insight' and 'data_to_insight' all → 'data_to_insight'"""
+    return _NON_ALNUM.sub("_", str(value).strip().lower()).strip("_")
+
+
+def reference_rows(data: dict, rel_path: str) -> list:
+    """Raw (unresolved) references in one YAML record"""
+    source = rel_path.split("/", 1)[1][:-len(".yaml")]
+    rows = []
+    for field_name in IMPLICIT_EDGE_FIELDS:
+        value = data.get(field_name)
+        for ref in value if isinstance(value, list) else [value]:
+            if ref is None or isinstance(ref, (dict, list)) or str(ref).strip() == "":
+                continue
+            rows.append({"source": source, "field": field_name, "ref": str(ref).strip(), "file_path": rel_path})
+    return rows
+
+
+def reference_lookup(entities: pd.DataFrame) -> pd.Series:
+    """reference key → entity id; ids win over names, ambiguous names are left out"""
+    ids = entities["id"].astype(str)
+    by_id = pd.Series(ids.to_numpy(), index=ids.map(reference_key))
+    by_id = by_id[~by_id.index.duplicated()]
+
+    names = entities["name"].fillna("").astype(str)
+    by_name = pd.Series(ids.to_numpy(), index=names.map(reference_key))
+    by_name = by_name[(by_name.index != "") & ~by_name.index.duplicated(keep=False)]
+    by_name = by_name[~by_name.index.isin(by_id.index)]
+    return pd.concat([by_id, by_name])
+
+
+def resolve_references(entities: pd.DataFrame, references: pd.DataFrame, columns: list):
+    """(edges with the given columns, unresolved references) for the raw reference table"""
+    lookup = reference_lookup(entities)
+    targets = references["ref"].map(reference_key).map(lookup)
+    resolved = references.assign(target=targets)[targets.notna() & (targets != references["source"])]
+    unresolved = references[targets.isna()][UNRESOLVED_COLUMNS].reset_index(drop=True)
+    if resolved.empty:
+        return pd.DataFrame(columns=columns), unresolved
+
+    names = pd.Series(entities["name"].fillna(entities["id"]).to_numpy(), index=entities["id"])
+    names = names[~names.index.duplicated()]
+    kinds = resolved["field"].map({f: t for f, (t, _) in IMPLICIT_EDGE_FIELDS.items()})
+    edges = pd.DataFrame({
+        "source": resolved["source"],
+        "target": resolved["target"],
+        "relationship_type": kinds,
+        "description": resolved["field"].map({f: d for f, (_, d) in IMPLICIT_EDGE_FIELDS.items()}),
+        "tags": "",
+        "name": (resolved["source"].map(names).fillna(resolved["source"]) + " – "
+                 + resolved["target"].map(names).fillna(resolved["target"])),
+        "file_path": resolved["file_path"],
+    })
+    edges = edges.drop_duplicates(["source", "target", "relationship_type"])
+    return edges[columns].reset_index(drop=True), unresolved
@@ -0,0 +1,51 @@
+## Relationship set for the Relationships page: parsed once per index version (it is
+## the edge table), filtered with vectorised string ops, results memoised per
+## normalised search in a small LRU. Facet selections are applied by the page
+## through kb.facets, so this is the only text filter over relations.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FILTER_CACHE_SIZE = 128
+
+
+def normalise_search(search: str = "") -> str:
+    return (search or "").strip().lower()
+
+
+def split_edges(edges: pd.DataFrame):
+    """(edges declared in relationship files, edges derived from entity fields)"""
+    declared = edges["file_path"].astype(str).str.startswith("relationships/").to_numpy()
+    return edges[declared], edges[~declared]
+
+
+class RelationshipSet:
+    def __init__(self, edges: pd.DataFrame):
+        self.frame = edges.reset_index(drop=True)
+        # Lower-cased search column, computed once per version
+        self._name = self.frame["name"].fillna("").str.lower()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _positions(self, search: str) -> np.ndarray:
+        if not search:
+            return np.arange(len(self.frame))
+        return np.flatnonzero(self._name.str.contains(search, regex=False).to_numpy())
+
+    def filter(self, search: str = "") -> pd.DataFrame:
+        """Relations whose name contains search (case-insensitive)"""
+        key = normalise_search(search)
+        with self._lock:
+            positions = self._cache.get(key)
+            if positions is not None:
+                self._cache.move_to_end(key)
+        if positions is None:
+            positions = self._positions(key)
+            with self._lock:
+                self._cache[key] = positions
+                while len(self._cache) > FILTER_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return self.frame.iloc[positions]
@@ -0,0 +1,243 @@
+## Graph rendering through the kb_graph Streamlit component (kb/frontend)
+## The component loads the vendored vis-network bundle once per browser session;
+## each rerun only ships node/edge JSON, or in incremental mode just the ops since
+## the last render. Payloads are cached by content hash in a shared, byte-bounded
+## LRU so unchanged graphs skip layout and serialisation.
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from kb.layout import apply_layout
+from kb.metrics import scaled_sizes
+from kb.profiling import stage
+
+DEFAULT_CACHE_BYTES = int(os.environ.get("KB_GRAPH_CACHE_MB", "64")) * 1024 * 1024
+FRONTEND_DIR = Path(__file__).parent / "frontend"
+DEFAULT_HEIGHT = 750
+
+# forceAtlas2 physics as pyvis used to configure it
+DEFAULT_OPTIONS = {
+    "physics": {
+        "solver": "forceAtlas2Based",
+        "forceAtlas2Based": {
+            "gravitationalConstant": -50,
+            "centralGravity": 0.01,
+            "springLength": 100,
+            "springConstant": 0.08,
+            "damping": 0.4,
+            "avoidOverlap": 0,
+        },
+    },
+}
+
+_graph_component = components.declare_component("kb_graph", path=str(FRONTEND_DIR))
+
+
+class PayloadCache:
+    """Thread-safe LRU of serialised graph payloads bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, payload: tuple):
+        """payload is (dict, serialised text); its cost is the text size"""
+        cost = len(payload[1].encode("utf-8"))
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            self._items[key] = (payload, cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, (_, old_cost) = self._items.popitem(last=False)
+                self.size -= old_cost
+
+    def __len__(self):
+        return len(self._items)
+
+
+payload_cache = PayloadCache()
+
+
+def graph_key(nodes: list, edges: list, options=None, layout_mode: str = "static") -> str:
+    payload = json.dumps([nodes, edges, options, layout_mode], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def entity_nodes(entities: pd.DataFrame, node_ids, size_metric: str = "degree",
+                 colour_field: str = "type") -> list:
+    """Node dicts for node_ids, sized/coloured from the precomputed metric columns.
+
+    Ids without an entity row (edge endpoints with no YAML) come out as small
+    "Unclassified" nodes. Sorted by id so equal graphs hash equally in the cache.
+    """
+    shown = entities[entities["id"].isin(node_ids)].drop_duplicates("id").sort_values("id")
+    sizes = scaled_sizes(shown[size_metric])
+    nodes = []
+    for row, size in zip(shown.to_dict("records"), sizes):
+        label = row["name"] or row["id"]
+        label_type = row["type"] or "Unknown"
+        title = (f"{label_type}: {label}"
+                 f"<br>Degree: {row['degree']} (in {row['in_degree']} / out {row['out_degree']})"
+                 f"<br>PageRank: {row['pagerank']:.4f} · Betweenness: {row['betweenness']:.4f}"
+                 f"<br>Component: {row['component']} ({row['component_size']} nodes)")
+        group = row[colour_field]
+        nodes.append({"id": row["id"], "label": label, "title": title,
+                      "group": "Unknown" if pd.isna(group) or group == "" else str(group),
+                      "size": round(float(size), 2)})
+    for node_id in sorted(set(node_ids) - set(shown["id"])):
+        nodes.append({"id": node_id, "label": node_id, "title": node_id, "group": "Unclassified", "size": 10})
+    return nodes
+
+
+def membership_graph(people: pd.DataFrame, limit: int = None):
+    """(person nodes, entity → person edges, people left out) for membership rows (see kb.temporal).
+
+    limit: at most this many people, those with the most memberships first (ties by id)
+    """
+    dropped = 0
+    if limit is not None and people["person_id"].nunique() > limit:
+        links = people["person_id"].value_counts()
+        keep = links.rename_axis("person_id").reset_index(name="n").sort_values(
+            ["n", "person_id"], ascending=[False, True], kind="stable")["person_id"].head(limit)
+        dropped = len(links) - len(keep)
+        people = people[people["person_id"].isin(keep)]
+    nodes = [{"id": person_id, "label": name, "title": f"Person: {name}", "group": "Person", "size": 8}
+             for person_id, name in people[["person_id", "target"]].drop_duplicates("person_id")
+             .sort_values("person_id").itertuples(index=False, name=None)]
+    edges = [{"source": source, "target": person_id, "label": "hasMember", "title": role or "Member"}
+             for source, person_id, role in people[["source", "person_id", "label"]].fillna("")
+             .itertuples(index=False, name=None)]
+    return nodes, edges, dropped
+
+
+def build_payload(nodes: list, edges: list, options=None, layout_mode: str = "static") -> dict:
+    """vis-network data: nodes (x/y pinned for precomputed layouts), from/to edges, options.
+
+    nodes: dicts with id/label/title/group/size (+ any vis node fields);
+    edges: dicts with source/target/label/title (+ any vis edge fields).
+    """
+    if isinstance(options, str):
+        options = json.loads(options)
+    options = copy.deepcopy(options or DEFAULT_OPTIONS)
+    options.setdefault("nodes", {}).setdefault("shape", "dot")
+    options.setdefault("edges", {}).setdefault("arrows", {"to": {"enabled": True}})
+
+    vis_nodes = [dict(node) for node in nodes]
+    vis_edges = []
+    seen = defaultdict(int)
+    for edge in edges:
+        edge = dict(edge)
+        edge["from"], edge["to"] = edge.pop("source"), edge.pop("target")
+        if "id" not in edge:
+            # Stable ids so incremental updates can address edges across renders
+            base = f"{edge['from']}\u2192{edge['to']}:{edge.get('label', '')}"
+            edge["id"] = f"{base}#{seen[base]}" if seen[base] else base
+            seen[base] += 1
+        vis_edges.append(edge)
+    apply_layout(vis_nodes, vis_edges, options, layout_mode)
+    return {"nodes": vis_nodes, "edges": vis_edges, "options": options}
+
+
+def graph_payload(nodes: list, edges: list, options=None, layout_mode: str = "static"):
+    """(payload dict, serialised payload) for build_payload, from cache when possible"""
+    key = graph_key(nodes, edges, options, layout_mode)
+    cached = payload_cache.get(key)
+    if cached is None:
+        payload = build_payload(nodes, edges, options, layout_mode)
+        cached = (payload, json.dumps(payload, default=str))
+        payload_cache.put(key, cached)
+    return cached
+
+
+# === Incremental updates: per-session diff against what the browser already shows ===
+def diff_items(old: dict, new: dict, keep=()) -> dict:
+    """add/update/remove ops turning old into new (both id → item); keep fields stay as the client has them"""
+    add = [item for item_id, item in new.items() if item_id not in old]
+    remove = [item_id for item_id in old if item_id not in new]
+    update = []
+    for item_id, item in new.items():
+        prev = old.get(item_id)
+        if prev is None:
+            continue
+        changed = {k: v for k, v in item.items() if k not in keep and prev.get(k) != v}
+        if changed:
+            update.append({"id": item_id, **changed})
+    return {"add": add, "update": update, "remove": remove}
+
+
+def graph_message(state: dict, payload: dict, text: str, resync=None) -> str:
+    """Component message: the whole graph, or only the ops since the client's revision.
+
+    state is the session's record of what was last sent; a resync request from a
+    client that lost track (fresh iframe) or a first render gets the full graph.
+    """
+    nodes = {n["id"]: n for n in payload["nodes"]}
+    edges = {e["id"]: e for e in payload["edges"]}
+    full = not state or (resync is not None and resync != state.get("resync"))
+    if not full and nodes == state["nodes"] and edges == state["edges"] and payload["options"] == state["options"]:
+        return state["message"]
+
+    rev = state.get("rev", 0) + 1
+    if full:
+        message = f'{{"rev": {rev}, "full": true, "graph": {text}}}'
+    else:
+        ops = {
+            "rev": rev,
+            "base": state["rev"],
+            # Nodes already on screen keep their position: no jump, no re-stabilisation
+            "nodes": diff_items(state["nodes"], nodes, keep=("x", "y")),
+            "edges": diff_items(state["edges"], edges),
+        }
+        if payload["options"] != state["options"]:
+            ops["options"] = payload["options"]
+        message = json.dumps(ops, default=str)
+    state.update(rev=rev, nodes=nodes, edges=edges, options=payload["options"], message=message,
+                 resync=resync if resync is not None else state.get("resync"))
+    return message
+
+
+def render_graph(nodes: list, edges: list, options=None, layout_mode: str = "static",
+                 height: int = DEFAULT_HEIGHT, key: str = "kb_graph", incremental: bool = False):
+    """Draw the graph in the kb_graph component.
+
+    A fixed key keeps the same iframe (and its loaded vis-network) across reruns.
+    incremental=True sends only node/edge add/update/remove ops relative to the
+    previous render, preserving zoom, positions and physics state in the browser.
+    """
+    with stage("render", nodes=len(nodes), edges=len(edges)) as info:
+        payload, text = graph_payload(nodes, edges, options, layout_mode)
+        if incremental:
+            state = st.session_state.setdefault(f"_{key}_sent", {})
+            resync = (st.session_state.get(key) or {}).get("resync")
+            data = graph_message(state, payload, text, resync)
+        else:
+            st.session_state.pop(f"_{key}_sent", None)
+            data = f'{{"rev": 0, "full": true, "graph": {text}}}'
+        info["bytes"] = len(data)
+        return _graph_component(data=data, height=height, key=key, default=None)
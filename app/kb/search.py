@@ -0,0 +1,188 @@
+## Full-text search for the sidebar "Search (name/tags/org)" box
+## Built at ingestion time: token postings per file (search_postings.parquet) plus a
+## trigram → vocabulary table (search_trigrams.parquet) for typo-tolerant lookup.
+## Query = exact / prefix / fuzzy expansion of each typed token, ranked by
+## field weight × idf; every typed token has to match something.
+
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from kb.paths import SEARCH_POSTINGS_FILE, SEARCH_TRIGRAMS_FILE
+from kb.query import filter_entities
+
+# Field → weight contributed to a term's posting for that file
+SEARCH_FIELDS = {
+    "name": 3.0,
+    "organisation": 2.0,
+    "tags": 2.0,
+    "description": 1.0,
+    "notes": 1.0,
+}
+
+POSTING_COLUMNS = ["term", "weight", "file_path"]
+TRIGRAM_COLUMNS = ["gram", "term"]
+
+EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.6
+MIN_FUZZY_LEN = 4
+MIN_SIMILARITY = 0.35
+MAX_EXPANSIONS = 200
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalise(text: str) -> str:
+    """Lowercase, accents stripped (so 'Tâche' finds 'tache')"""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(normalise(text))
+
+
+def trigrams(term: str) -> set:
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# === Build side (called per file by index_builder) ===
+def posting_rows(data: dict, rel_path: str) -> list:
+    weights = defaultdict(float)
+    for field, weight in SEARCH_FIELDS.items():
+        value = data.get(field)
+        if not value:
+            continue
+        if isinstance(value, list):
+            value = " ".join(str(v) for v in value)
+        for term in set(tokenize(str(value))):
+            weights[term] += weight
+    return [{"term": t, "weight": w, "file_path": rel_path} for t, w in weights.items()]
+
+
+def trigram_table(postings: pd.DataFrame) -> pd.DataFrame:
+    """gram → term rows over the whole vocabulary (global pass, rebuilt when dirty)"""
+    rows = [(gram, term) for term in postings["term"].unique() for gram in trigrams(term)]
+    return pd.DataFrame(rows, columns=TRIGRAM_COLUMNS)
+
+
+# === Query side ===
+class SearchIndex:
+    """CSR-style postings (term id → doc ids/weights) plus trigram → term ids"""
+
+    # Everything a query needs, as flat arrays (see kb.snapshot)
+    ARRAYS = ("vocab", "docs", "post_docs", "post_weights", "offsets", "idf",
+              "grams", "gram_offsets", "gram_term_ids", "term_gram_count")
+
+    def __init__(self, postings: pd.DataFrame, grams: pd.DataFrame):
+        self.vocab = np.sort(postings["term"].unique()).astype(str)
+        docs = np.sort(postings["file_path"].unique()).astype(str)
+        term_ids = np.searchsorted(self.vocab, postings["term"].to_numpy(dtype=str))
+        doc_ids = np.searchsorted(docs, postings["file_path"].to_numpy(dtype=str))
+        # Sorted, so doc id order is file_path order
+        self.docs = pd.Series(docs, dtype=str)
+
+        order = np.argsort(term_ids, kind="stable")
+        self.post_docs = doc_ids[order]
+        self.post_weights = postings["weight"].to_numpy(dtype=float)[order]
+        self.offsets = np.searchsorted(term_ids[order], np.arange(len(self.vocab) + 1))
+        doc_freq = np.diff(self.offsets)
+        self.idf = np.log1p(len(self.docs) / np.maximum(doc_freq, 1))
+
+        # gram → term ids as CSR over the sorted distinct grams
+        grams = grams[grams["term"].isin(self.vocab)]
+        gram_strs = grams["gram"].to_numpy(dtype=str)
+        gram_order = np.argsort(gram_strs, kind="stable")
+        self.grams, starts = np.unique(gram_strs[gram_order], return_index=True)
+        self.gram_offsets = np.append(starts, len(gram_order))
+        self.gram_term_ids = np.searchsorted(self.vocab, grams["term"].to_numpy(dtype=str))[gram_order]
+        self.term_gram_count = np.bincount(self.gram_term_ids, minlength=len(self.vocab))
+
+    @classmethod
+    def load(cls, postings_path=SEARCH_POSTINGS_FILE, trigrams_path=SEARCH_TRIGRAMS_FILE) -> "SearchIndex":
+        return cls(pd.read_parquet(postings_path), pd.read_parquet(trigrams_path))
+
+    def to_arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "SearchIndex":
+        """Rebuild from to_arrays() output without recomputing (e.g. snapshot views)"""
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        # Binary search needs comparable numpy strings; docs stay an Arrow-backed Series
+        index.vocab = np.asarray(index.vocab, dtype=str)
+        index.grams = np.asarray(index.grams, dtype=str)
+        index.docs = pd.Series(index.docs, dtype=str)
+        return index
+
+    # --- term expansion: (term ids, match quality) ---
+    def _prefix_terms(self, token: str):
+        lo = np.searchsorted(self.vocab, token, side="left")
+        hi = np.searchsorted(self.vocab, token + "\uffff", side="left")
+        ids = np.arange(lo, min(hi, lo + MAX_EXPANSIONS))
+        quality = np.where(self.vocab[ids] == token, EXACT, PREFIX)
+        return ids, quality
+
+    def _gram_terms(self, gram: str) -> np.ndarray:
+        pos = np.searchsorted(self.grams, gram)
+        if pos == len(self.grams) or self.grams[pos] != gram:
+            return np.empty(0, dtype=int)
+        return self.gram_term_ids[self.gram_offsets[pos]:self.gram_offsets[pos + 1]]
+
+    def _fuzzy_terms(self, token: str):
+        candidates = np.concatenate([np.empty(0, dtype=int), *map(self._gram_terms, trigrams(token))])
+        if not len(candidates):
+            return np.empty(0, dtype=int), np.empty(0)
+        common = np.bincount(candidates, minlength=len(self.vocab))
+        ids = np.nonzero(common)[0]
+        sim = common[ids] / (len(trigrams(token)) + self.term_gram_count[ids] - common[ids])
+        keep = sim >= MIN_SIMILARITY
+        ids, sim = ids[keep], sim[keep]
+        top = np.argsort(-sim, kind="stable")[:MAX_EXPANSIONS]
+        return ids[top], FUZZY * sim[top]
+
+    def _token_scores(self, token: str) -> np.ndarray:
+        """Best score per doc for one typed token (0 = no match)"""
+        ids, quality = self._prefix_terms(token)
+        if len(token) >= MIN_FUZZY_LEN:
+            f_ids, f_quality = self._fuzzy_terms(token)
+            ids = np.concatenate([ids, f_ids])
+            quality = np.concatenate([quality, f_quality])
+
+        scores = np.zeros(len(self.docs))
+        for term_id, q in zip(ids, quality):
+            lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+            contrib = q * self.idf[term_id] * self.post_weights[lo:hi]
+            np.maximum.at(scores, self.post_docs[lo:hi], contrib)
+        return scores
+
+    def search(self, query: str, limit: int = None) -> pd.DataFrame:
+        """Ranked file_path/score for docs matching every token of the query"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not len(self.docs):
+            return pd.DataFrame({"file_path": pd.Series(dtype=str), "score": pd.Series(dtype=float)})
+        total = np.zeros(len(self.docs))
+        matched = np.ones(len(self.docs), dtype=bool)
+        for token in tokens:
+            scores = self._token_scores(token)
+            matched &= scores > 0
+            total += scores
+        hits = np.nonzero(matched)[0]
+        hits = hits[np.lexsort((hits, -total[hits]))]
+        if limit:
+            hits = hits[:limit]
+        return pd.DataFrame({"file_path": self.docs.iloc[hits].to_numpy(), "score": total[hits]})
+
+
+def search_files(index: SearchIndex, search: str = "") -> list:
+    """file_path of every entity matching search, best first; None when nothing was typed"""
+    if not (search or "").strip():
+        return None
+    if not tokenize(search):
+        return filter_entities(search)["file_path"].tolist()
+    return index.search(search)["file_path"].tolist()
@@ -0,0 +1,119 @@
+## Versioned Arrow IPC snapshot of a built knowledge base: data/snapshots/kb-<version>.arrow
+## Written by the index builder alongside Parquet/DuckDB; the app memory-maps it, so
+## the entity/edge/interval tables and the precomputed search, graph, facet and
+## temporal arrays are zero-copy views on pages the OS shares between every worker
+## on the host.
+## Layout: one single-row record batch; tables are list<struct> columns
+## ("table:<name>"), flat arrays list<primitive> columns ("array:<name>").
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from kb.facets import FacetIndex
+from kb.graph import GraphIndex
+from kb.paths import SNAPSHOT_DIR
+from kb.query import arrow_frame
+from kb.search import SearchIndex
+from kb.temporal import TemporalIndex
+
+SNAPSHOT_FORMAT = "3"
+# Older versions kept so a worker switching over never loses its file mid-read
+KEEP_SNAPSHOTS = 2
+
+
+def snapshot_path(data_dir: Path, version: str) -> Path:
+    return Path(data_dir) / SNAPSHOT_DIR.name / f"kb-{version}.arrow"
+
+
+def _single_row(values: pa.Array) -> pa.Array:
+    return pa.LargeListArray.from_arrays(pa.array([0, len(values)], pa.int64()), values)
+
+
+def _table_column(df: pd.DataFrame) -> pa.Array:
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    batches = table.to_batches()
+    batch = batches[0] if batches else pa.RecordBatch.from_arrays(
+        [pa.nulls(0, f.type) for f in table.schema], schema=table.schema)
+    return _single_row(batch.to_struct_array())
+
+
+def index_arrays(entities: pd.DataFrame, edges: pd.DataFrame, postings: pd.DataFrame,
+                 grams: pd.DataFrame, intervals: pd.DataFrame, graph: dict = None) -> dict:
+    """Precomputed query structures, flattened: "<index>.<array>" → array.
+
+    graph: the previous build's graph arrays, when its node ids and edge endpoints are unchanged
+    """
+    parts = {
+        "search": SearchIndex(postings, grams).to_arrays(),
+        "graph": graph if graph is not None else GraphIndex.graph_arrays(entities, edges),
+        "facets": FacetIndex.build(entities).to_arrays(),
+        "temporal": TemporalIndex(entities, edges, intervals).to_arrays(),
+    }
+    return {f"{part}.{name}": values for part, arrays in parts.items() for name, values in arrays.items()}
+
+
+def write_snapshot(path: Path, version: str, tables: dict, arrays: dict):
+    """Write tables ({name: DataFrame}) and arrays ({name: 1-D array}) atomically, prune old versions"""
+    names, columns = [], []
+    for name, df in tables.items():
+        names.append(f"table:{name}")
+        columns.append(_table_column(df))
+    for name, values in arrays.items():
+        names.append(f"array:{name}")
+        if isinstance(values, pa.Array):
+            # e.g. string arrays carried over from a mapped snapshot
+            columns.append(_single_row(values))
+            continue
+        values = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+        if values.dtype.kind in "OU":
+            columns.append(_single_row(pa.array(values.tolist(), pa.string())))
+        else:
+            columns.append(_single_row(pa.array(values)))
+    batch = pa.RecordBatch.from_arrays(columns, names=names)
+    batch = batch.replace_schema_metadata({"version": version, "format": SNAPSHOT_FORMAT})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    os.replace(tmp, path)
+
+    # Mapped files stay readable after unlink (POSIX), so pruning never breaks a loaded snapshot
+    older = sorted((p for p in path.parent.glob("kb-*.arrow") if p != path),
+                   key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in older[KEEP_SNAPSHOTS - 1:]:
+        stale.unlink(missing_ok=True)
+
+
+class Snapshot:
+    """Memory-mapped snapshot: tables and arrays are views on the mapped file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        reader = pa.ipc.open_file(pa.memory_map(str(self.path)))
+        self.batch = reader.get_batch(0)
+        metadata = {k.decode(): v.decode() for k, v in (self.batch.schema.metadata or {}).items()}
+        if metadata.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{self.path.name}: unsupported snapshot format {metadata.get('format')!r}")
+        self.version = metadata["version"]
+
+    def table(self, name: str) -> pd.DataFrame:
+        values = self.batch.column(f"table:{name}").values
+        return arrow_frame(pa.Table.from_batches([pa.RecordBatch.from_struct_array(values)]))
+
+    def array(self, name: str):
+        """Numeric arrays as read-only numpy views, string arrays as Arrow arrays"""
+        values = self.batch.column(f"array:{name}").values
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            return values
+        return values.to_numpy(zero_copy_only=True)
+
+    def arrays(self, prefix: str) -> dict:
+        """{name: array} for every "<prefix>.<name>" array"""
+        start = f"array:{prefix}."
+        return {name[len(start):]: self.array(name[len("array:"):])
+                for name in self.batch.schema.names if name.startswith(start)}
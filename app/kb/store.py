@@ -0,0 +1,164 @@
+## Process-wide knowledge-base store shared by every session (st.cache_resource)
+## One immutable KnowledgeBase snapshot per index version: entity frame (with graph
+## metric columns), edge index, graph adjacency, relationship set, search index,
+## facet bitmaps and temporal interval index, memory-mapped from the build's
+## Arrow snapshot (kb.snapshot) and swapped atomically when the index changes.
+## A background watcher (kb.watcher) rebuilds as YAMLs change, so reruns just pick
+## up the latest snapshot.
+## Snapshots are shared read-only — pages must filter into new frames, never mutate.
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from kb.edges import EdgeIndex
+from kb.facets import FacetIndex
+from kb.graph import GraphIndex
+from kb.index_builder import build_index, read_table
+from kb.paths import (
+    DATA_DIR, EDGES_FILE, INTERVALS_FILE, PARQUET_FILE, SEARCH_POSTINGS_FILE, SEARCH_TRIGRAMS_FILE,
+    UNRESOLVED_REFS_FILE,
+)
+from kb.profiling import stage
+from kb.relationships import RelationshipSet, split_edges
+from kb.search import SearchIndex
+from kb.snapshot import Snapshot, snapshot_path
+from kb.temporal import TemporalIndex
+from kb.watcher import POLL_INTERVAL, DataWatcher, watch_enabled
+
+
+@dataclass(frozen=True)
+class KnowledgeBase:
+    version: str
+    entities: pd.DataFrame
+    edges: EdgeIndex
+    graph: GraphIndex
+    relationships: RelationshipSet
+    search: SearchIndex
+    facets: FacetIndex = None
+    temporal: TemporalIndex = None
+    # Implicit edges (lead_organisation, collaborators, ...), kept apart from relationship files
+    derived_relationships: RelationshipSet = None
+    unresolved: pd.DataFrame = None
+    errors: dict = field(default_factory=dict)
+
+
+def load_knowledge_base(data_dir: Path, version: str, errors: dict = None) -> KnowledgeBase:
+    """Memory-map the version's snapshot when there is one, else rebuild from the Parquet tables"""
+    path = snapshot_path(data_dir, version)
+    if path.exists():
+        return load_snapshot(Snapshot(path), errors)
+    entities = read_table(data_dir / PARQUET_FILE.name)
+    edges = EdgeIndex.load(data_dir / EDGES_FILE.name)
+    declared, derived = split_edges(edges.edges)
+    return KnowledgeBase(
+        version=version,
+        entities=entities,
+        edges=edges,
+        graph=GraphIndex(entities, edges.edges),
+        relationships=RelationshipSet(declared),
+        derived_relationships=RelationshipSet(derived),
+        search=SearchIndex.load(data_dir / SEARCH_POSTINGS_FILE.name, data_dir / SEARCH_TRIGRAMS_FILE.name),
+        facets=FacetIndex.build(entities),
+        temporal=TemporalIndex(entities, edges.edges, read_table(data_dir / INTERVALS_FILE.name)),
+        unresolved=pd.read_parquet(data_dir / UNRESOLVED_REFS_FILE.name),
+        errors=dict(errors or {}),
+    )
+
+
+def load_snapshot(snap: Snapshot, errors: dict = None) -> KnowledgeBase:
+    """KnowledgeBase over a mapped snapshot: no index is recomputed, tables/arrays are views"""
+    entities = snap.table("entities")
+    edges = EdgeIndex(snap.table("edges"))
+    declared, derived = split_edges(edges.edges)
+    facets = FacetIndex.from_arrays(snap.arrays("facets"), entities)
+    return KnowledgeBase(
+        version=snap.version,
+        entities=entities,
+        edges=edges,
+        graph=GraphIndex.from_arrays(snap.arrays("graph"), entities),
+        relationships=RelationshipSet(declared),
+        derived_relationships=RelationshipSet(derived),
+        search=SearchIndex.from_arrays(snap.arrays("search")),
+        facets=facets,
+        temporal=TemporalIndex.from_arrays(snap.arrays("temporal"), snap.table("intervals")),
+        unresolved=snap.table("unresolved_references"),
+        errors=dict(errors or {}),
+    )
+
+
+class KnowledgeBaseStore:
+    """Holds the current KnowledgeBase; readers never see a half-loaded one"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self._kb = None
+        self._lock = threading.Lock()
+        self.watcher = None
+
+    @property
+    def version(self):
+        return self._kb.version if self._kb is not None else None
+
+    def current(self) -> KnowledgeBase:
+        """The latest snapshot.
+
+        With a watcher running this never builds inline (after the first load);
+        otherwise it runs the incremental build (a stat() per file when nothing changed).
+        """
+        kb = self._kb
+        if kb is not None and self.watcher is not None and self.watcher.running:
+            return kb
+        return self.refresh()
+
+    def refresh(self) -> KnowledgeBase:
+        """Incremental build, reload on a new version"""
+        with stage("ingest") as info:
+            result = build_index(self.data_dir)
+            info.update(added=len(result.added), changed=len(result.changed), removed=len(result.removed))
+        kb = self._kb
+        if kb is not None and kb.version == result.version:
+            return kb
+        with self._lock:
+            if self._kb is None or self._kb.version != result.version:
+                # Load fully, then swap the reference: sessions mid-rerun keep their snapshot
+                with stage("load") as info:
+                    self._kb = load_knowledge_base(self.data_dir, result.version, result.errors)
+                    info.update(entities=len(self._kb.entities), edges=len(self._kb.edges.edges))
+            return self._kb
+
+    def start_watching(self, **kwargs) -> DataWatcher:
+        """Rebuild in a background thread whenever YAMLs under data_dir change"""
+        if self.watcher is None or not self.watcher.running:
+            self.watcher = DataWatcher(self.data_dir, self.refresh, **kwargs).start()
+        return self.watcher
+
+
+@st.cache_resource(show_spinner=False)
+def get_store() -> KnowledgeBaseStore:
+    store = KnowledgeBaseStore(DATA_DIR)
+    if watch_enabled():
+        store.start_watching()
+    return store
+
+
+def follow_updates(kb: KnowledgeBase, interval: float = POLL_INTERVAL):
+    """Rerun this session when the background watcher publishes a newer index version"""
+    seen = st.session_state.get("_kb_version")
+    if seen is not None and seen != kb.version:
+        st.toast("🔄 Data changed: showing the updated index")
+    st.session_state["_kb_version"] = kb.version
+
+    store = get_store()
+    if store.watcher is None:
+        return
+
+    @st.fragment(run_every=interval)
+    def _check_version():
+        if store.version not in (None, kb.version):
+            st.rerun()
+
+    _check_version()
@@ -0,0 +1,65 @@
+## Tag → row bitmaps over the entity frame, built once per index version
+## (the same structure indexes the other facet columns, see kb.facets).
+## Each tag owns a packed bitmap (one bit per entity row), so selecting tags is an
+## OR over their bitmaps and combining facets is AND — set operations instead of
+## substring scans over joined strings.
+
+import numpy as np
+import pandas as pd
+
+
+class TagIndex:
+    """Packed value bitmaps over the rows of an entity frame.
+
+    column is an Arrow list column (tags: a row carries every value in its list) or a
+    scalar one (region, type...: one value per row, blanks carry none).
+    """
+
+    def __init__(self, entities: pd.DataFrame, column: str = "tags"):
+        self.n = len(entities)
+        values = entities[column]
+        if isinstance(values.dtype, pd.ArrowDtype):
+            lengths = values.list.len().fillna(0).to_numpy(dtype=np.int64)
+            rows = np.repeat(np.arange(self.n), lengths)
+            flat = values.list.flatten().to_numpy(dtype=object)
+        else:
+            flat = values.astype(object).to_numpy()
+            rows = np.flatnonzero(pd.notna(flat) & (flat != ""))
+            flat = flat[rows].astype(str).astype(object)
+
+        codes, vocab = pd.factorize(flat, sort=True)
+        pairs = np.unique(codes.astype(np.int64) * max(self.n, 1) + rows)
+        codes, rows = pairs // max(self.n, 1), pairs % max(self.n, 1)
+        self.tags = np.asarray(vocab, dtype=object)
+        self.counts = np.bincount(codes, minlength=len(self.tags))
+        # Row r lives in byte r >> 3 at bit 7 - (r & 7), matching np.packbits/unpackbits
+        self.bitmaps = np.zeros((len(self.tags), (self.n + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(self.bitmaps, (codes, rows >> 3), (0x80 >> (rows & 7)).astype(np.uint8))
+
+    def to_arrays(self) -> dict:
+        return {"tags": self.tags, "counts": self.counts, "bitmaps": self.bitmaps.ravel()}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, entities: pd.DataFrame) -> "TagIndex":
+        """Rebuild from to_arrays() output without recomputing the bitmaps (e.g. snapshot views)"""
+        index = cls.__new__(cls)
+        index.n = len(entities)
+        index.tags = np.asarray(arrays["tags"], dtype=object)
+        index.counts = arrays["counts"]
+        index.bitmaps = arrays["bitmaps"].reshape(len(index.tags), (index.n + 7) // 8)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def tag_id(self, tag: str) -> int:
+        """Id of an exact tag, -1 if unknown"""
+        pos = np.searchsorted(self.tags, tag)
+        return int(pos) if pos < len(self.tags) and self.tags[pos] == tag else -1
+
+    def bitmap(self, tag_ids) -> np.ndarray:
+        """OR of the given tags' bitmaps"""
+        tag_ids = np.asarray(tag_ids, dtype=np.int64)
+        if not len(tag_ids):
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[tag_ids], axis=0)
@@ -0,0 +1,211 @@
+## Temporal index: dated attributes captured at ingest, queried by day
+## Each file contributes interval rows (patched incrementally like any table):
+##   record      the file's own validity: start_date/end_date (or from/to) on an
+##               entity, or on a relationship file (source → target)
+##   membership  one per `persons` entry: entity → person (role), from/to
+## Dates may be full (2023-06-01) or partial (2023, 2023-06); a missing bound is open.
+## Edges inherit the interval of the file that declares them, so one lookup by
+## file_path dates entities, relationship edges and implicit edges alike.
+## "Active on day d" is answered from two sorted arrays per interval set, never
+## by rescanning records.
+
+import calendar
+import datetime as dt
+import re
+
+import numpy as np
+import pandas as pd
+
+from kb.references import reference_key
+
+INTERVAL_COLUMNS = ["kind", "source", "target", "label", "start", "end", "file_path"]
+
+# (start field, end field) pairs, first present pair wins
+DATE_FIELDS = [("start_date", "end_date"), ("from", "to")]
+
+OPEN_START = np.iinfo(np.int64).min
+OPEN_END = np.iinfo(np.int64).max
+
+_PARTIAL_DATE = re.compile(r"^(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?$")
+
+
+def parse_date(value, end: bool = False):
+    """ISO date string for a YAML date/datetime or 'YYYY[-MM[-DD]]'; partial dates
+    resolve to their first day (or last, for an end bound). None when missing/invalid."""
+    if isinstance(value, dt.datetime):
+        return value.date().isoformat()
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    if isinstance(value, int):
+        value = str(value)
+    match = _PARTIAL_DATE.match(str(value).strip()) if value is not None else None
+    if not match:
+        return None
+    year, month, day = int(match[1]), match[2], match[3]
+    month = int(month) if month else (12 if end else 1)
+    try:
+        day = int(day) if day else (calendar.monthrange(year, month)[1] if end else 1)
+        return dt.date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _bounds(data: dict):
+    for start_field, end_field in DATE_FIELDS:
+        if data.get(start_field) is not None or data.get(end_field) is not None:
+            return parse_date(data.get(start_field)), parse_date(data.get(end_field), end=True)
+    return None, None
+
+
+def interval_rows(data: dict, rel_path: str) -> list:
+    """Dated attributes in one YAML record"""
+    entity_id = rel_path.split("/", 1)[1][:-len(".yaml")]
+    rows = []
+    start, end = _bounds(data)
+    if start or end:
+        is_relationship = rel_path.startswith("relationships/")
+        rows.append({
+            "kind": "record",
+            "source": str(data.get("source") or "") if is_relationship else entity_id,
+            "target": str(data.get("target") or "") if is_relationship else "",
+            "label": str(data.get("relationship_type") or "") if is_relationship else "",
+            "start": start, "end": end, "file_path": rel_path,
+        })
+    persons = data.get("persons")
+    for person in persons if isinstance(persons, list) else []:
+        if not isinstance(person, dict) or not str(person.get("name") or "").strip():
+            continue
+        start, end = _bounds(person)
+        rows.append({
+            "kind": "membership",
+            "source": entity_id,
+            "target": str(person["name"]).strip(),
+            "label": str(person.get("role") or "").strip(),
+            "start": start, "end": end, "file_path": rel_path,
+        })
+    return rows
+
+
+def day_number(values, open_value: int) -> np.ndarray:
+    """ISO date strings → int64 days since 1970-01-01 (missing → open_value)"""
+    dates = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy("datetime64[D]")
+    days = dates.astype(np.int64)
+    days[np.isnat(dates)] = open_value
+    return days
+
+
+def to_day(date: dt.date) -> int:
+    return (date - dt.date(1970, 1, 1)).days
+
+
+def from_day(day: int) -> dt.date:
+    return dt.date(1970, 1, 1) + dt.timedelta(days=int(day))
+
+
+class DateIntervals:
+    """Closed [start, end] day intervals, one per row of some frame.
+
+    Rows active on a day are a prefix of the start-sorted order intersected with a
+    suffix of the end-sorted order: both bounds come from binary search and only the
+    smaller side is checked against the other bound.
+    """
+
+    ARRAYS = ("start", "end", "by_start", "starts", "by_end", "ends")
+
+    def __init__(self, start: np.ndarray, end: np.ndarray):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.by_start = np.argsort(self.start, kind="stable")
+        self.starts = self.start[self.by_start]
+        self.by_end = np.argsort(self.end, kind="stable")
+        self.ends = self.end[self.by_end]
+
+    def to_arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "DateIntervals":
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        return index
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def active(self, day: int) -> np.ndarray:
+        """Sorted row positions whose interval contains day"""
+        started = np.searchsorted(self.starts, day, side="right")
+        ended = np.searchsorted(self.ends, day, side="left")
+        if started <= len(self) - ended:
+            rows = self.by_start[:started]
+            rows = rows[self.end[rows] >= day]
+        else:
+            rows = self.by_end[ended:]
+            rows = rows[self.start[rows] <= day]
+        return np.sort(rows)
+
+    def mask(self, day: int) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.active(day)] = True
+        return mask
+
+    def dated(self) -> np.ndarray:
+        """Finite bounds (for slider ranges)"""
+        bounds = np.concatenate([self.start, self.end])
+        return bounds[(bounds != OPEN_START) & (bounds != OPEN_END)]
+
+
+class TemporalIndex:
+    """Validity intervals for entity rows, edge rows and person memberships"""
+
+    def __init__(self, entities: pd.DataFrame, edges: pd.DataFrame, intervals: pd.DataFrame):
+        records = intervals[intervals["kind"] == "record"].drop_duplicates("file_path")
+        files = pd.Index(records["file_path"])
+        # Trailing open bound: get_indexer's -1 (undated file) picks it
+        starts = np.append(day_number(records["start"], OPEN_START), OPEN_START)
+        ends = np.append(day_number(records["end"], OPEN_END), OPEN_END)
+
+        def spans(file_paths):
+            pos = files.get_indexer(file_paths)
+            return DateIntervals(starts[pos], ends[pos])
+
+        self.entities = spans(entities["file_path"])
+        self.edges = spans(edges["file_path"])
+        self.memberships = membership_frame(intervals)
+        self.people = DateIntervals(day_number(self.memberships["start"], OPEN_START),
+                                    day_number(self.memberships["end"], OPEN_END))
+
+    def to_arrays(self) -> dict:
+        return {f"{part}.{name}": values for part in ("entities", "edges", "people")
+                for name, values in getattr(self, part).to_arrays().items()}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, intervals: pd.DataFrame) -> "TemporalIndex":
+        """Rebuild from to_arrays() output without re-sorting (e.g. snapshot views)"""
+        index = cls.__new__(cls)
+        for part in ("entities", "edges", "people"):
+            setattr(index, part, DateIntervals.from_arrays(
+                {name: arrays[f"{part}.{name}"] for name in DateIntervals.ARRAYS}))
+        index.memberships = membership_frame(intervals)
+        return index
+
+    def date_range(self):
+        """(first, last) date mentioned anywhere, or None when nothing is dated"""
+        bounds = np.concatenate([part.dated() for part in (self.entities, self.edges, self.people)])
+        if not len(bounds):
+            return None
+        return from_day(bounds.min()), from_day(bounds.max())
+
+    def people_on(self, day: int, entity_ids=None) -> pd.DataFrame:
+        """Memberships active on day (optionally only for the given entities)"""
+        people = self.memberships.iloc[self.people.active(day)]
+        if entity_ids is not None:
+            people = people[people["source"].isin(entity_ids)]
+        return people
+
+
+def membership_frame(intervals: pd.DataFrame) -> pd.DataFrame:
+    """Membership rows (entity → person) in interval order, with a node id per person"""
+    people = intervals[intervals["kind"] == "membership"].reset_index(drop=True)
+    return people.assign(person_id="person:" + people["target"].map(reference_key))[["source", "target", "label", "start", "end", "person_id"]]
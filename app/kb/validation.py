@@ -0,0 +1,378 @@
+## Schema validation for data/ YAMLs (CLI: scripts/validate_schema.py)
+## One validator per @type, compiled once per process (a plain-Python fast path,
+## cerberus only for error details); files validated in a chunked process pool;
+## per-file results cached by content hash so unchanged files are skipped; then
+## cross-file checks that references name real entity files.
+
+import hashlib
+import json
+import os
+import time
+from datetime import date
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cerberus
+from cerberus import Validator
+
+from kb.index_builder import file_hash, scan_data_dir
+from kb.ingest import DEFAULT_CHUNKSIZE, PARALLEL_MIN_FILES, default_workers, load_yaml
+from kb.paths import DATA_DIR, VALIDATION_CACHE_FILE
+
+# Bump when the checks change in ways the schema fingerprint can't see
+VALIDATION_VERSION = 1
+
+# Controlled subtype lists (SCCM-aligned)
+VALID_ORG_SUBTYPES = {
+    "Local Authority",
+    "Government Department",
+    "Research Partnership",
+    "University",
+    "Charity",
+    "Consultancy",
+    "Inspection Body",
+    "Health Organisation",
+    "Police Force",
+    "Voluntary Sector",
+    "Technology Provider",
+    "Funder"
+}
+
+VALID_PERSON_SUBTYPES = {
+    "DCS",
+    "Consultant",
+    "Practitioner",
+    "Academic",
+    "Analyst",
+    "Service Lead",
+    "Policy Advisor",
+    "Director",
+    "Programme Manager",
+    "Data Specialist",
+    "Commissioner",
+    "Inspector"
+}
+
+
+def _optional(type_, **rules) -> dict:
+    return {"type": type_, "required": False, "nullable": True, **rules}
+
+
+_STRING_LIST = _optional("list", schema={"type": "string"})
+_DATE = _optional(["date", "string"])
+
+# Fields every entity may carry
+BASE_SCHEMA = {
+    "@type": {"type": "string", "required": True},
+    "name": {"type": "string", "required": True},
+    "subtype": _optional("string"),
+    "organisation": _optional("string"),
+    "projects": _STRING_LIST,
+    "tags": _STRING_LIST,
+    "region": _optional("string"),
+    "description": _optional("string"),
+    "notes": _optional("string"),
+    "role": _optional("string"),
+}
+
+# @type → fields on top of BASE_SCHEMA
+TYPE_SCHEMAS = {
+    "ORGANIZATION": {
+        "organisation_type": _optional("string"),
+        "website": _optional("string"),
+        "lead_organisation": _optional("string"),
+        "persons": _optional("list", schema={"type": "dict", "schema": {
+            "name": {"type": "string", "required": True},
+            "role": _optional("string"),
+            "notes": _optional("string"),
+            "from": _DATE,
+            "to": _DATE,
+        }}),
+    },
+    "PERSON": {},
+    "AGENT": {},
+    "SERVICE": {
+        "lead_organisation": _optional("string"),
+        "collaborators": _STRING_LIST,
+        "start_date": _DATE,
+        "end_date": _DATE,
+    },
+    "RELATIONSHIP": {
+        "source": {"type": "string", "required": True},
+        "target": {"type": "string", "required": True},
+        "relationship_type": {"type": "string", "required": True},
+        "start_date": _DATE,
+        "end_date": _DATE,
+    },
+}
+
+SCHEMAS = {entry_type: {**BASE_SCHEMA, **extra} for entry_type, extra in TYPE_SCHEMAS.items()}
+
+# Fields naming other entities (by file stem) → level when the target doesn't exist
+REFERENCE_FIELDS = {
+    "source": "error",
+    "target": "error",
+    "collaborators": "warning",
+    "lead_organisation": "warning",
+}
+
+_validators = {}
+
+
+def schema_fingerprint() -> str:
+    """Changes whenever cached results may no longer hold"""
+    payload = json.dumps([VALIDATION_VERSION, cerberus.__version__, SCHEMAS, sorted(VALID_ORG_SUBTYPES),
+                          sorted(VALID_PERSON_SUBTYPES), REFERENCE_FIELDS], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "list": lambda v: isinstance(v, list),
+    "dict": lambda v: isinstance(v, dict),
+    "date": lambda v: isinstance(v, date),
+}
+
+
+def _compile_rules(rules: dict):
+    """Plain-Python predicate for one field's rules, or None if they use anything else"""
+    if set(rules) - {"type", "required", "nullable", "schema"}:
+        return None
+    types = rules["type"] if isinstance(rules["type"], list) else [rules["type"]]
+    if any(t not in _TYPE_CHECKS for t in types):
+        return None
+    type_checks = [_TYPE_CHECKS[t] for t in types]
+    nullable = rules.get("nullable", False)
+    item_check = None
+    if "schema" in rules:
+        sub = rules["schema"]
+        # list → rules for every item; dict → a nested field schema
+        item_check = _compile_rules(sub) if "list" in types else compile_schema(sub)
+        if item_check is None:
+            return None
+
+    def check(value) -> bool:
+        if value is None:
+            return nullable
+        if not any(t(value) for t in type_checks):
+            return False
+        if item_check is not None:
+            return all(map(item_check, value)) if isinstance(value, list) else item_check(value)
+        return True
+    return check
+
+
+def compile_schema(schema: dict):
+    """Fast yes/no check equivalent to a strict cerberus Validator for the rule subset
+    used here (type/required/nullable/schema); None if the schema needs more."""
+    fields = {name: _compile_rules(rules) for name, rules in schema.items()}
+    if any(check is None for check in fields.values()):
+        return None
+    required = {name for name, rules in schema.items() if rules.get("required")}
+
+    def check(doc) -> bool:
+        if not isinstance(doc, dict) or not required <= doc.keys():
+            return False
+        for name, value in doc.items():
+            field_check = fields.get(name)
+            if field_check is None or not field_check(value):
+                return False
+        return True
+    return check
+
+
+def validator_for(entry_type: str):
+    """(fast check, cerberus Validator) for an @type, built once per process.
+
+    The compiled check decides the common all-valid case; cerberus only runs on
+    documents it rejects, to produce the detailed error messages.
+    """
+    compiled = _validators.get(entry_type)
+    if compiled is None:
+        schema = SCHEMAS[entry_type]
+        compiled = _validators[entry_type] = (compile_schema(schema), Validator(schema))
+    return compiled
+
+
+def _issue(level: str, field_name: str, message: str) -> dict:
+    return {"level": level, "field": field_name, "message": message}
+
+
+# === Per-file checks (run in workers, cached by content hash) ===
+def check_record(data: dict) -> list:
+    entry_type = data.get("@type")
+    if entry_type not in SCHEMAS:
+        return [_issue("error", "@type", f"unknown @type {entry_type!r}; must be one of {sorted(SCHEMAS)}")]
+
+    fast_check, v = validator_for(entry_type)
+    issues = []
+    if (fast_check is None or not fast_check(data)) and not v.validate(data):
+        for field_name, errors in sorted(v.errors.items(), key=lambda kv: str(kv[0])):
+            issues.append(_issue("error", str(field_name), json.dumps(errors, default=str)))
+
+    subtype = data.get("subtype")
+    if entry_type == "ORGANIZATION":
+        if not subtype:
+            issues.append(_issue("error", "subtype", "missing required 'subtype' for ORGANIZATION"))
+        elif subtype not in VALID_ORG_SUBTYPES:
+            issues.append(_issue("error", "subtype", f"invalid ORGANIZATION subtype '{subtype}'. "
+                                                     f"Must be one of: {sorted(VALID_ORG_SUBTYPES)}"))
+    elif entry_type == "PERSON":
+        if not subtype:
+            issues.append(_issue("warning", "subtype", "missing recommended 'subtype' for PERSON"))
+        elif subtype not in VALID_PERSON_SUBTYPES:
+            issues.append(_issue("error", "subtype", f"invalid PERSON subtype '{subtype}'. "
+                                                     f"Must be one of: {sorted(VALID_PERSON_SUBTYPES)}"))
+    return issues
+
+
+def record_refs(data: dict) -> dict:
+    """REFERENCE_FIELDS values in a record, as lists of strings"""
+    refs = {}
+    for field_name in REFERENCE_FIELDS:
+        value = data.get(field_name)
+        values = value if isinstance(value, list) else [value]
+        values = [str(v) for v in values if v not in (None, "")]
+        if values:
+            refs[field_name] = values
+    return refs
+
+
+def _validate_chunk(chunk: list) -> list:
+    out = []
+    for rel_path, path in chunk:
+        try:
+            data = load_yaml(path)
+        except Exception as e:
+            out.append((rel_path, [_issue("error", "", f"{type(e).__name__}: {e}")], {}))
+            continue
+        out.append((rel_path, check_record(data), record_refs(data)))
+    return out
+
+
+def validate_files(files: dict, workers: int = None, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Validate {rel_path: path} → {rel_path: (issues, refs)}"""
+    items = [(rel_path, str(path)) for rel_path, path in files.items()]
+    workers = default_workers() if workers is None else max(1, workers)
+    if workers == 1 or len(items) < PARALLEL_MIN_FILES:
+        results = _validate_chunk(items)
+    else:
+        results = []
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_result in pool.map(_validate_chunk, chunks):
+                results.extend(chunk_result)
+    return {rel_path: (issues, refs) for rel_path, issues, refs in results}
+
+
+# === Cache ===
+def load_cache(path: Path = VALIDATION_CACHE_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("fingerprint") != schema_fingerprint():
+        return {}
+    return cache.get("files", {})
+
+
+def save_cache(entries: dict, path: Path = VALIDATION_CACHE_FILE):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": schema_fingerprint(), "files": entries}, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# === Report ===
+@dataclass
+class ValidationReport:
+    files: dict = field(default_factory=dict)  # rel_path → list of issues
+    checked: int = 0  # files validated this run
+    cached: int = 0  # files whose cached result was reused
+    seconds: float = 0.0
+
+    def count(self, level: str) -> int:
+        return sum(issue["level"] == level for issues in self.files.values() for issue in issues)
+
+    @property
+    def ok(self) -> bool:
+        return self.count("error") == 0
+
+    def to_json(self) -> dict:
+        return {
+            "summary": {
+                "files": len(self.files),
+                "checked": self.checked,
+                "cached": self.cached,
+                "errors": self.count("error"),
+                "warnings": self.count("warning"),
+                "seconds": round(self.seconds, 3),
+            },
+            "files": {rel_path: issues for rel_path, issues in sorted(self.files.items())},
+        }
+
+    def to_junit(self) -> str:
+        """One testcase per file; errors as failures, warnings in system-out"""
+        suite = ET.Element("testsuite", name="schema-validation", tests=str(len(self.files)),
+                           failures=str(sum(any(i["level"] == "error" for i in issues)
+                                            for issues in self.files.values())),
+                           time=f"{self.seconds:.3f}")
+        for rel_path, issues in sorted(self.files.items()):
+            folder, _, filename = rel_path.rpartition("/")
+            case = ET.SubElement(suite, "testcase", classname=folder or "data", name=filename)
+            errors = [i for i in issues if i["level"] == "error"]
+            warnings = [i for i in issues if i["level"] != "error"]
+            if errors:
+                failure = ET.SubElement(case, "failure", message=f"{len(errors)} schema error(s)")
+                failure.text = "\n".join(f"{i['field']}: {i['message']}" for i in errors)
+            if warnings:
+                ET.SubElement(case, "system-out").text = "\n".join(
+                    f"warning: {i['field']}: {i['message']}" for i in warnings)
+        return ET.tostring(suite, encoding="unicode")
+
+
+# === Tree validation ===
+def validate_tree(data_dir: Path = DATA_DIR, workers: int = None, use_cache: bool = True) -> ValidationReport:
+    """Validate every indexable YAML under data_dir (templates excluded), reusing cached results"""
+    started = time.perf_counter()
+    data_dir = Path(data_dir)
+    cache_file = data_dir / VALIDATION_CACHE_FILE.name
+    current = scan_data_dir(data_dir)
+    old = load_cache(cache_file) if use_cache else {}
+
+    entries, to_check = {}, {}
+    for rel_path, path in current.items():
+        st = path.stat()
+        entry = old.get(rel_path)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            entries[rel_path] = entry
+            continue
+        digest = file_hash(path)
+        if entry and entry["sha256"] == digest:
+            entries[rel_path] = {**entry, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            continue
+        entries[rel_path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+        to_check[rel_path] = path
+
+    for rel_path, (issues, refs) in validate_files(to_check, workers).items():
+        entries[rel_path].update(issues=issues, refs=refs)
+
+    # === Referential integrity: cross-file, so never cached ===
+    ids = {rel_path.rsplit("/", 1)[-1][:-len(".yaml")] for rel_path in current}
+    report = ValidationReport(checked=len(to_check), cached=len(current) - len(to_check))
+    for rel_path, entry in sorted(entries.items()):
+        issues = list(entry["issues"])
+        for field_name, values in entry["refs"].items():
+            for value in values:
+                if value not in ids:
+                    issues.append(_issue(REFERENCE_FIELDS[field_name], field_name,
+                                         f"'{value}' does not match any entity file"))
+        report.files[rel_path] = issues
+
+    if use_cache and entries != old:
+        save_cache(entries, cache_file)
+    report.seconds = time.perf_counter() - started
+    return report
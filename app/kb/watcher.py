@@ -0,0 +1,127 @@
+## Background re-indexing: watch data/ for YAML changes and hand them to a callback
+## (the store's incremental rebuild) once the burst has settled.
+## Polling stat() snapshots of the tree is the default backend; watchdog is an
+## optional extra (not in requirements.txt) and, when installed, its native file
+## events are used instead. Either way the rebuild runs in the watcher thread.
+##
+## KB_WATCH=0                disable (the store then checks the index on every rerun)
+## KB_WATCH_DEBOUNCE=secs    quiet period before rebuilding (default 1)
+## KB_WATCH_POLL=secs        polling interval without watchdog (default 2)
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from kb.index_builder import scan_data_dir
+
+DEBOUNCE_SECONDS = float(os.environ.get("KB_WATCH_DEBOUNCE", "1"))
+POLL_INTERVAL = float(os.environ.get("KB_WATCH_POLL", "2"))
+
+logger = logging.getLogger("kb.watcher")
+
+
+def watch_enabled() -> bool:
+    return os.environ.get("KB_WATCH", "1") not in ("", "0")
+
+
+def snapshot(data_dir: Path) -> dict:
+    """rel_path → (mtime_ns, size) for every indexable YAML"""
+    state = {}
+    for rel_path, path in scan_data_dir(data_dir).items():
+        try:
+            st = path.stat()
+        except OSError:  # deleted between listing and stat
+            continue
+        state[rel_path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def _event_observer(data_dir: Path, notify):
+    """A started watchdog observer calling notify() on YAML events, or None without watchdog"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class YamlHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            paths = (event.src_path, getattr(event, "dest_path", "") or "")
+            if not event.is_directory and any(str(p).endswith(".yaml") for p in paths):
+                notify()
+
+    observer = Observer()
+    observer.daemon = True
+    try:
+        observer.schedule(YamlHandler(), str(data_dir), recursive=True)
+        observer.start()
+    except OSError as e:  # e.g. inotify watch limit reached
+        logger.warning("File events unavailable (%s); polling %s instead", e, data_dir)
+        return None
+    return observer
+
+
+class DataWatcher:
+    """Debounced change detection over data_dir; calls on_change() in its own thread"""
+
+    def __init__(self, data_dir: Path, on_change, debounce: float = DEBOUNCE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL, use_events: bool = True):
+        self.data_dir = Path(data_dir)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_events = use_events
+        self.observer = None
+        self._changed_at = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+
+    @property
+    def mode(self) -> str:
+        return "events" if self.observer is not None else "polling"
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def notify(self):
+        """Mark the tree as changed (restarts the debounce window)"""
+        self._changed_at = time.monotonic()
+        self._wake.set()
+
+    def start(self):
+        if self.use_events:
+            self.observer = _event_observer(self.data_dir, self.notify)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self.observer is not None:
+            self.observer.stop()
+        self._thread.join()
+
+    def _run(self):
+        last = snapshot(self.data_dir) if self.observer is None else None
+        while not self._stop.is_set():
+            timeout = self.poll_interval if self._changed_at is None else self.debounce
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self.observer is None:
+                current = snapshot(self.data_dir)
+                if current != last:
+                    last = current
+                    self.notify()
+                    self._wake.clear()
+            if self._changed_at is not None and time.monotonic() - self._changed_at >= self.debounce:
+                self._changed_at = None
+                try:
+                    self.on_change()
+                except Exception:  # keep watching; the next change retries the build
+                    logger.exception("Background re-index of %s failed", self.data_dir)
@@ -1,68 +1,65 @@
 import streamlit as st
-import yaml
-import os
-from pathlib import Path
+
+from kb.profiling import page_run, stage
+from kb.store import follow_updates, get_store
 
 st.set_page_config(page_title="Sector Relations", layout="wide")
 st.title("🔗 Relations Between Sector Entities")
+with page_run("Relationships"):
+    # === Get filters from session state ===
+    filters = st.session_state.get("filters", {})
+    search = filters.get("search", "")
+    facets = {column: values for column, values in filters.get("facets", {}).items() if values}
 
-# === Path Setup ===
-ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = ROOT / "data"
-REL_DIR = DATA_DIR / "relationships"
-
-# === Get filters from session state ===
-filters = st.session_state.get("filters", {})
-folder_filter = filters.get("folder", "")
-search = filters.get("search", "").lower()
-region = filters.get("region", "").lower()
-tag = filters.get("tag", "").lower()
+    # === Relationships: parsed once per index version, filtered per (normalised) filter set ===
+    with st.spinner("🔄 Loading relationships..."):
+        kb = get_store().current()
+        with stage("query") as info:
+            relationships = kb.relationships.filter(search=search)
+            derived = kb.derived_relationships.filter(search=search)
+            if facets:
+                # Relations declared in, or touching, an entity the facets select
+                selected = kb.entities.iloc[kb.facets.rows(facets)]
 
-# === Load and filter relationship files ===
-@st.cache_data(show_spinner=False)
-def load_filtered_relationships(path):
-    relationships = []
-    for file in os.listdir(path):
-        if file.endswith(".yaml") and not file.startswith("0_template"):
-            try:
-                with open(path / file, "r") as f:
-                    data = yaml.safe_load(f)
-                    data["__filename"] = file
+                def touching(frame):
+                    return frame[frame["file_path"].isin(selected["file_path"])
+                                 | frame["source"].isin(selected["id"]) | frame["target"].isin(selected["id"])]
 
-                    # === Apply filters
-                    if search and search not in data.get("name", "").lower():
-                        continue
-                    if tag and not any(tag in t.lower() for t in data.get("tags", [])):
-                        continue
-                    if region and region not in data.get("description", "").lower():
-                        continue
-                    if folder_filter and folder_filter != "All":
-                        if folder_filter not in data.get("source", "") and folder_filter not in data.get("target", ""):
-                            continue
+                relationships, derived = touching(relationships), touching(derived)
+            info.update(rows=len(relationships), derived=len(derived))
+    follow_updates(kb)
 
-                    relationships.append(data)
+    for path, err in kb.errors.items():
+        if path.startswith("relationships/"):
+            st.warning(f"Error reading {path}: {err}")
 
-            except Exception as e:
-                st.warning(f"Error reading {file}: {e}")
-    return relationships
+    # === References in entity files (leads, collaborators, projects) that name no known entity ===
+    if len(kb.unresolved):
+        with st.expander(f"⚠️ {len(kb.unresolved)} unresolved reference(s)", expanded=False):
+            st.dataframe(kb.unresolved, hide_index=True, use_container_width=True)
 
-with st.spinner("🔄 Loading relationships..."):
-    relationships = load_filtered_relationships(REL_DIR)
+    # === Output
+    st.markdown(f"### Found {len(relationships)} matching relations")
 
-# === Output
-st.markdown(f"### Found {len(relationships)} matching relations")
+    if len(relationships):
+        for rel in relationships.to_dict("records"):
+            st.markdown("----")
+            st.subheader(rel.get("name") or "Unnamed relationship")
+            st.markdown(f"**Filename:** `{rel['file_path'].split('/', 1)[-1]}`")
+            st.markdown(f"**Source:** `{rel.get('source') or 'N/A'}`")
+            st.markdown(f"**Target:** `{rel.get('target') or 'N/A'}`")
+            st.markdown(f"**Type:** `{rel.get('relationship_type') or 'unspecified'}`")
+            if rel.get("tags"):
+                st.markdown(f"**Tags:** `{rel['tags']}`")
+            if rel.get("description"):
+                st.markdown(f"**Description:** {rel['description']}")
+    else:
+        st.warning("No relationships match your current filters.")
 
-if relationships:
-    for rel in relationships:
+    # === Implicit relations: entity fields naming other entities, not relationship files ===
+    if len(derived):
         st.markdown("----")
-        st.subheader(rel.get("name", "Unnamed relationship"))
-        st.markdown(f"**Filename:** `{rel.get('__filename', '')}`")
-        st.markdown(f"**Source:** `{rel.get('source', 'N/A')}`")
-        st.markdown(f"**Target:** `{rel.get('target', 'N/A')}`")
-        st.markdown(f"**Type:** `{rel.get('relationship_type', 'unspecified')}`")
-        if rel.get("tags"):
-            st.markdown(f"**Tags:** `{', '.join(rel.get('tags', []))}`")
-        if rel.get("description"):
-            st.markdown(f"**Description:** {rel['description']}")
-else:
-    st.warning("No relationships match your current filters.")
+        with st.expander(f"🧩 {len(derived)} relation(s) derived from entity fields "
+                         "(lead organisation, collaborators, projects, organisation)", expanded=False):
+            st.dataframe(derived[["source", "relationship_type", "target", "description", "file_path"]],
+                         hide_index=True, use_container_width=True)
@@ -1,102 +1,120 @@
+import datetime as dt
+
 import streamlit as st
-import pandas as pd
-from pyvis.network import Network
-from collections import defaultdict
-from pathlib import Path
-import yaml
-import os
+
+from kb.clusters import CLUSTER_FIELDS, DEFAULT_NODE_BUDGET, LOD_MODES, cluster_graph, cluster_labels, top_nodes
+from kb.layout import LAYOUT_MODES
+from kb.metrics import COLOUR_FIELDS, SIZE_METRICS
+from kb.profiling import page_run, stage
+from kb.render import entity_nodes, membership_graph, render_graph
+from kb.search import search_files
+from kb.store import follow_updates, get_store
+from kb.temporal import to_day
 
 st.set_page_config(page_title="Network Graph", layout="wide")
 st.title("Children's Social Care Network Graph")
-
-# === Paths ===
-ROOT = Path(__file__).resolve().parents[1]
-DATA_DIR = ROOT / "data"
-RELS_DIR = DATA_DIR / "relationships"
-PARQUET_FILE = DATA_DIR / "index_data.parquet"
-GRAPH_FILE = ROOT / "relationship_graph.html"
-
-
-# === Paths ===
-ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = ROOT / "data"
-RELS_DIR = DATA_DIR / "relationships"
-PARQUET_FILE = DATA_DIR / "index_data.parquet"
-
-# # === Optional toggle: D2I-only filter ===
-# use_d2i_filter = st.sidebar.checkbox("Limit to Data to Insight?", value=False)
-
-# # === Read filters from session ===
-filters = st.session_state.get("filters", {})
-# if use_d2i_filter:
-#     filters["search"] = "data to insight"
-
-# === Load Parquet data ===
-if not PARQUET_FILE.exists():
-    st.error("Parquet file not found. Run Home page first to (re)generate it.")
-    st.stop()
-else:
-    df = pd.read_parquet(PARQUET_FILE)
-
-# === Apply filters ===
-if filters.get("search"):
-    df = df[df.apply(lambda r: filters["search"].lower() in (
-        str(r["name"]) + str(r["tags"]) + str(r["organisation"])
-    ).lower(), axis=1)]
-
-if filters.get("folder") not in [None, "All"]:
-    df = df[df["folder"] == filters["folder"]]
-
-if filters.get("region"):
-    df = df[df["region"].str.lower().str.contains(filters["region"].lower(), na=False)]
-
-if filters.get("tag"):
-    df = df[df["tags"].str.lower().str.contains(filters["tag"].lower(), na=False)]
-
-# === Build graph ===
-G = Network(height="700px", width="100%", directed=True, notebook=False)
-G.force_atlas_2based()
-included_nodes = set()
-node_metadata = {}
-node_degrees = defaultdict(int)
-edges = []
-
-# === Add nodes from filtered dataframe ===
-for _, row in df.iterrows():
-    node_id = row["filename"].replace(".yaml", "")
-    label = row["name"] or node_id
-    included_nodes.add(node_id)
-    node_metadata[node_id] = {
-        "label": label,
-        "title": f"{row['type']}: {label}",
-        "group": row["type"]
-    }
-
-# === Add edges if both source/target present ===
-for file in os.listdir(RELS_DIR):
-    if file.endswith(".yaml") and not file.startswith("0_template"):
-        with open(RELS_DIR / file) as f:
-            data = yaml.safe_load(f)
-            source = data.get("source")
-            target = data.get("target")
-            label = data.get("relationship_type", "relatesTo")
-            if source in included_nodes and target in included_nodes:
-                node_degrees[source] += 1
-                node_degrees[target] += 1
-                edges.append((source, target, label, data.get("description", "")))
-
-if included_nodes:
-    for node_id, meta in node_metadata.items():
-        degree = node_degrees.get(node_id, 1)
-        size = 10 + degree * 2
-        G.add_node(node_id, label=meta["label"], title=meta["title"], group=meta["group"], size=size)
-
-    for source, target, label, desc in edges:
-        G.add_edge(source, target, label=label, title=desc)
-
-    G.write_html(str(GRAPH_FILE), notebook=False)
-    st.markdown(f"### Interactive Network Graph ({len(included_nodes)} nodes, {len(edges)} edges)")
-    with open(GRAPH_FILE, 'r', encoding='utf-8') as f:
-        st.components.v1.html(f.read(), height=750, scrolling=False)
-else:
-    st.warning("No matching entities found for current filters.")
+with page_run("Network View"):
+    # # === Optional toggle: D2I-only filter ===
+    # use_d2i_filter = st.sidebar.checkbox("Limit to Data to Insight?", value=False)
+
+    # # === Read filters from session ===
+    filters = st.session_state.get("filters", {})
+    # if use_d2i_filter:
+    #     filters["search"] = "data to insight"
+
+    # === Shared knowledge base (built/reloaded by the store, shared across sessions) ===
+    kb = get_store().current()
+    follow_updates(kb)
+
+    # === Time slider: the network as it stood on a date (interval index lookups, undated = always) ===
+    st.sidebar.header("🕰️ Timeline")
+    date_range = kb.temporal.date_range()
+    time_mode = st.sidebar.checkbox("Show the network on a date", value=False, disabled=date_range is None,
+                                    help="Uses start_date/end_date (or from/to) on entities and relationships "
+                                         "and from/to on persons; records without dates always show.")
+    day = None
+    if time_mode and date_range:
+        first, last = date_range
+        last = max(last, dt.date.today(), first + dt.timedelta(days=1))
+        as_of = st.sidebar.slider("As of", min_value=first, max_value=last, value=last, format="YYYY-MM-DD")
+        show_people = st.sidebar.checkbox("Show people (persons active on that date)", value=True)
+        day = to_day(as_of)
+
+    # === Apply filters (ranked search index + facet bitmaps, as set on the Map Elements page) ===
+    with stage("query") as info:
+        hits = search_files(kb.search, filters.get("search", ""))
+        search_rows = None if hits is None else kb.facets.positions(hits)
+        rows = kb.facets.rows(filters.get("facets", {}), search_rows)
+        if day is not None:
+            rows = rows[kb.temporal.entities.mask(day)[rows]]
+            info["as_of"] = as_of.isoformat()
+        df = kb.entities.iloc[rows].reset_index(drop=True)
+        info["rows"] = len(df)
+
+    active_edges = kb.temporal.edges.mask(day) if day is not None else None
+
+
+    def select_edges(node_ids):
+        """Induced edges among node_ids (only those valid on the chosen date in time mode)"""
+        edges = kb.edges.select(node_ids, how="both")
+        return edges if active_edges is None else edges[active_edges[edges.index]]
+
+
+    # === Build graph ===
+    layout_choice = st.sidebar.selectbox("Graph layout", list(LAYOUT_MODES))
+    size_by = st.sidebar.selectbox("Size nodes by", list(SIZE_METRICS))
+    colour_by = st.sidebar.selectbox("Colour nodes by", list(COLOUR_FIELDS))
+    incremental = st.sidebar.checkbox("Incremental updates (keep zoom and layout)", value=True)
+
+    # === Level of detail: bounded node count per render, clusters expanded on demand ===
+    st.sidebar.header("🔭 Level of detail")
+    lod_mode = st.sidebar.radio("Show", LOD_MODES)
+    node_budget = st.sidebar.number_input("Node budget", min_value=20, max_value=5000, value=DEFAULT_NODE_BUDGET, step=10)
+    clustered = lod_mode == "Clusters" or (lod_mode == "Auto" and len(df) > node_budget)
+
+    # === Add edges if both source/target present (vectorised join on edge table) ===
+    with stage("graph_assembly") as info:
+        edges_df = select_edges(df["id"])
+
+        if len(df) and clustered:
+            cluster_by = st.sidebar.selectbox("Cluster by", list(CLUSTER_FIELDS))
+            cluster_field = CLUSTER_FIELDS[cluster_by]
+            expanded = st.sidebar.multiselect("Expand clusters", sorted(cluster_labels(df, cluster_field).unique()))
+            nodes, graph_edges, hidden = cluster_graph(df, edges_df, cluster_field, expanded, node_budget,
+                                                       SIZE_METRICS[size_by], COLOUR_FIELDS[colour_by])
+            if hidden:
+                st.info(f"Node budget reached: {hidden} entities of the expanded clusters stay collapsed.")
+        elif len(df):
+            shown = top_nodes(df, node_budget, SIZE_METRICS[size_by])
+            people = None
+            if day is not None and show_people:
+                # People share the node budget: those of the top entities, up to half of it
+                people = kb.temporal.people_on(day, shown["id"])
+                people_budget = min(people["person_id"].nunique(), node_budget // 2)
+                shown = top_nodes(df, node_budget - people_budget, SIZE_METRICS[size_by])
+            if len(shown) < len(df):
+                st.info(f"Showing the top {len(shown)} of {len(df)} entities by {size_by.lower()} (node budget).")
+                edges_df = select_edges(shown["id"])
+            # Styled from the precomputed graph metrics (global degree/PageRank/betweenness)
+            nodes = entity_nodes(shown, set(shown["id"]), SIZE_METRICS[size_by], COLOUR_FIELDS[colour_by])
+            graph_edges = [{"source": source, "target": target, "label": label, "title": desc}
+                           for source, target, label, desc in
+                           edges_df[["source", "target", "relationship_type", "description"]].itertuples(index=False, name=None)]
+            if people is not None:
+                person_nodes, person_edges, dropped = membership_graph(people[people["source"].isin(shown["id"])],
+                                                                       limit=node_budget - len(shown))
+                nodes, graph_edges = nodes + person_nodes, graph_edges + person_edges
+                if dropped:
+                    st.info(f"Node budget reached: {dropped} people with the fewest memberships are hidden.")
+        if len(df):
+            info.update(nodes=len(nodes), edges=len(graph_edges))
+
+    if len(df):
+        st.markdown(f"### Interactive Network Graph ({len(nodes)} nodes, {len(graph_edges)} edges)")
+        if day is not None:
+            st.caption(f"As of {as_of:%d %B %Y}: entities, relations and people valid on that date.")
+        # Only graph JSON is sent (incrementally: just the changes since the last rerun);
+        # identical filter states across sessions hit the shared payload cache
+        render_graph(nodes, graph_edges, layout_mode=LAYOUT_MODES[layout_choice], incremental=incremental)
+    else:
+        st.warning("No matching entities found for current filters.")
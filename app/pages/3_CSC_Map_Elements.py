@@ -131,110 +131,125 @@
 
 
 
-## First time: YAMLs → Pandas Df → saved to Parquet
-## Next runs: Parquet → fast Pandas filter → results
+## Every run: manifest diff → reparse only added/changed YAMLs → Parquet/DuckDB
+## Shared store holds one loaded copy per process; search runs on the full-text index,
+## facet filters and their counts on the precomputed value bitmaps
 
 import streamlit as st
 import pandas as pd
-import os, yaml
-from pathlib import Path
+
+from kb.export import EXPORT_FORMATS, export_file
+from kb.facets import FACETS
+from kb.metrics import SORT_METRICS
+from kb.paging import PAGE_SIZES, page_bounds, page_count
+from kb.profiling import page_run, stage
+from kb.search import search_files
+from kb.store import follow_updates, get_store
 
 st.set_page_config(page_title="Map of the World (SCCM)", layout="wide")
 st.title("Organisations, Tools, Services, Relations")
-
-# === Path Setup ===
-ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = ROOT / "data"
-PARQUET_FILE = DATA_DIR / "index_data.parquet"
-
-
-# === Load YAML Files and Cache as Parquet ===
-@st.cache_data(show_spinner=False)
-def load_and_cache_yaml(folder, parquet_path):
-    """Load YAML files, flatten key fields, and write to Parquet for speedup"""
-    records = []
-    for subfolder in os.listdir(folder):
-        subpath = folder / subfolder
-        if not subpath.is_dir():
-            continue
-        for file in os.listdir(subpath):
-            if file.endswith(".yaml") and not file.startswith("0_template"):
-                with open(subpath / file, 'r') as f:
-                    data = yaml.safe_load(f)
-                    data['filename'] = file
-                    data['folder'] = subfolder
-                    records.append({
-                        "name": data.get("name"),
-                        "type": data.get("@type"),
-                        "subtype": data.get("subtype", ""),
-                        "tags": ', '.join(data.get("tags", [])),
-                        "organisation": data.get("organisation", ""),
-                        "region": data.get("region", ""),
-                        "projects": ', '.join(data.get("projects", [])) if data.get("projects") else '',
-                        "folder": data.get("folder"),
-                        "filename": data.get("filename")
-                    })
-    df = pd.DataFrame(records)
-    df.to_parquet(parquet_path, index=False)  # Save for fast future access
-    return df
-
-with st.spinner("🔄 Loading and caching records..."):
-    if PARQUET_FILE.exists():
-        df = pd.read_parquet(PARQUET_FILE)
+with page_run("Map Elements"):
+    with st.spinner("🔄 Loading and caching records..."):
+        kb = get_store().current()
+    follow_updates(kb)
+    for path, err in kb.errors.items():
+        st.warning(f"Error reading {path}: {err}")
+
+    # === Sidebar: full-text search + facets (precomputed value bitmaps, counts under the other filters) ===
+    st.sidebar.header("🔍 Search Filters")
+    search_text = st.sidebar.text_input("Search (name/tags/org):", "")
+
+    with stage("query") as info:
+        hits = search_files(kb.search, search_text)
+        search_rows = None if hits is None else kb.facets.positions(hits)
+        base = None if search_rows is None else kb.facets.row_bitmap(search_rows)
+
+        # Selections as of this interaction; values dropped by a re-index can't stay selected
+        selected = {}
+        for column in FACETS.values():
+            key = f"facet_{column}"
+            known = [v for v in st.session_state.get(key, []) if kb.facets.indexes[column].tag_id(v) >= 0]
+            if known != st.session_state.get(key, known):
+                st.session_state[key] = known
+            selected[column] = known
+
+        for label, column in FACETS.items():
+            counts = kb.facets.counts(column, selected, base)
+            options = counts[(counts > 0) | counts.index.isin(selected[column])].sort_values(ascending=False,
+                                                                                             kind="stable")
+            if options.empty:
+                continue
+            st.sidebar.multiselect(label, options.index.tolist(), key=f"facet_{column}",
+                                   format_func=lambda v, counts=counts: f"{v} ({counts[v]})")
+
+        query_df = kb.entities.iloc[kb.facets.rows(selected, search_rows)].reset_index(drop=True)
+        info["rows"] = len(query_df)
+
+    st.session_state["filters"] = {
+        "search": search_text,
+        "facets": {column: values for column, values in selected.items() if values},
+    }
+
+    # === Output (paged: only the current window of rows becomes widgets) ===
+    st.markdown(f"### Found {len(query_df)} result(s)")
+
+    view_col, sort_col, size_col, page_col = st.columns([2, 1, 1, 1])
+    view_mode = view_col.radio("View", ["Cards", "Table"], horizontal=True)
+    sort_by = sort_col.selectbox("Sort by", list(SORT_METRICS))
+    page_size = size_col.selectbox("Per page", PAGE_SIZES, index=1)
+
+    # Back to page 1 whenever the result set (filters or index version) or page size changes
+    results_key = (kb.version, search_text, str(st.session_state["filters"]["facets"]), sort_by, page_size)
+    if st.session_state.get("results_key") != results_key:
+        st.session_state["results_key"] = results_key
+        st.session_state["results_page"] = 1
+    pages = page_count(len(query_df), page_size)
+    # Never above max_value, whatever left it there
+    st.session_state["results_page"] = min(max(1, int(st.session_state.get("results_page", 1))), pages)
+    page = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key="results_page")
+
+    # Metric sorts use the columns precomputed at index build time (stable, so ties keep relevance order)
+    with stage("sort_page") as info:
+        sort_column = SORT_METRICS[sort_by]
+        sorted_df = query_df.sort_values(sort_column, ascending=False, kind="stable") if sort_column else query_df
+        start, stop = page_bounds(len(query_df), page, page_size)
+        page_df = sorted_df.iloc[start:stop]
+        info["rows"] = len(page_df)
+    if len(query_df):
+        st.caption(f"Showing {start + 1}–{stop} of {len(query_df)}")
+
+    if view_mode == "Table":
+        # Compact mode: one Arrow-serialised grid, no per-row widgets
+        st.dataframe(page_df, hide_index=True, use_container_width=True)
     else:
-        df = load_and_cache_yaml(DATA_DIR, PARQUET_FILE)
-
-# === Sidebar filters ===
-st.sidebar.header("🔍 Search Filters")
-search_text = st.sidebar.text_input("Search (name/tags/org):", "")
-folder_filter = st.sidebar.selectbox("Entity Type", [
-    "All", "organizations", "services", "plans", "events", 
-    "relationships", "collections", "items", "resources"
-])
-region_filter = st.sidebar.text_input("Region contains:", "")
-tag_filter = st.sidebar.text_input("Tag contains:", "")
-
-st.session_state["filters"] = {
-    "tag": tag_filter,
-    "region": region_filter,
-    "folder": folder_filter,
-    "search": search_text
-}
-
-# === Filter Query ===
-query_df = df.copy()
-
-if search_text:
-    query_df = query_df[
-        query_df["name"].str.contains(search_text, case=False, na=False) |
-        query_df["tags"].str.contains(search_text, case=False, na=False) |
-        query_df["organisation"].str.contains(search_text, case=False, na=False)
-    ]
-
-if folder_filter != "All":
-    query_df = query_df[query_df["folder"] == folder_filter]
-
-if region_filter:
-    query_df = query_df[query_df["region"].str.contains(region_filter, case=False, na=False)]
-
-if tag_filter:
-    query_df = query_df[query_df["tags"].str.contains(tag_filter, case=False, na=False)]
-
-# === Output ===
-st.markdown(f"### Found {len(query_df)} result(s)")
-for _, row in query_df.iterrows():
-    with st.expander(f"🔗 {row['name']} ({row['type']})"):
-        for k, v in row.items():
-            if pd.notna(v) and v != "":
-                st.markdown(f"**{k.capitalize()}:** {v}")
-
-# === CSV Download ===
-if PARQUET_FILE.exists():
-    st.download_button(
-        label="📥 Download Full Index (CSV)",
-        data=df.to_csv(index=False),
-        file_name="index_data.csv",
-        mime="text/csv"
-    )
-else:
-    st.warning("No Parquet file found. YAMLs must be loaded first.")
+        for row in page_df.to_dict("records"):
+            with st.expander(f"🔗 {row['name']} ({row['type']})"):
+                for k, v in row.items():
+                    if isinstance(v, list):
+                        v = ", ".join(v)
+                    if pd.notna(v) and v != "":
+                        st.markdown(f"**{k.capitalize()}:** {v}")
+
+    # === Download (built only on request, cached on disk per index version / filter set) ===
+    st.markdown("----")
+    scope_col, format_col, button_col = st.columns([2, 1, 1])
+    export_scope = scope_col.radio("Download", ["Full index", "Filtered results"], horizontal=True)
+    export_format = format_col.selectbox("Format", list(EXPORT_FORMATS))
+    export_filters = st.session_state["filters"] if export_scope == "Filtered results" else None
+
+    export_key = (kb.version, export_format, export_filters)
+    if button_col.button("Prepare download"):
+        st.session_state["export_key"] = export_key
+
+    if st.session_state.get("export_key") == export_key:
+        load_frame = (lambda: query_df) if export_filters else (lambda: kb.entities)
+        with st.spinner("Preparing export..."), stage("export", format=export_format):
+            export_path = export_file(load_frame, kb.version, export_format, export_filters)
+        ext, mime = EXPORT_FORMATS[export_format]
+        with open(export_path, "rb") as f:
+            st.download_button(
+                label=f"📥 Download {export_scope} ({export_format})",
+                data=f,
+                file_name=f"index_data.{ext}",
+                mime=mime
+            )
@@ -0,0 +1,75 @@
+import streamlit as st
+
+from kb.graph import DEFAULT_NODE_LIMIT, MAX_DEPTH
+from kb.layout import LAYOUT_MODES
+from kb.metrics import COLOUR_FIELDS, SIZE_METRICS
+from kb.profiling import page_run, stage
+from kb.render import entity_nodes, render_graph
+from kb.store import follow_updates, get_store
+
+st.set_page_config(page_title="Graph Explorer", layout="wide")
+st.title("Explore the Network")
+with page_run("Graph Explorer"):
+    # === Shared knowledge base (adjacency index built once per index version) ===
+    kb = get_store().current()
+    follow_updates(kb)
+    entities = kb.entities.sort_values("id")
+    labels = dict(zip(entities["id"], entities["name"].fillna(entities["id"])))
+
+
+    def entity_label(node_id: str) -> str:
+        return f"{labels.get(node_id) or node_id} ({node_id})"
+
+
+    # === Query ===
+    st.sidebar.header("🧭 Graph Query")
+    query = st.sidebar.radio("Query", ["Neighbourhood", "Shortest path", "Project"])
+    node_limit = st.sidebar.number_input("Max nodes", min_value=10, max_value=2000, value=DEFAULT_NODE_LIMIT, step=10)
+    layout_choice = st.sidebar.selectbox("Graph layout", list(LAYOUT_MODES))
+    size_by = st.sidebar.selectbox("Size nodes by", list(SIZE_METRICS))
+    colour_by = st.sidebar.selectbox("Colour nodes by", list(COLOUR_FIELDS))
+
+    node_options = list(entities["id"])
+    truncated = False
+    if query == "Neighbourhood":
+        centre = st.selectbox("Entity", node_options, format_func=entity_label)
+        depth = st.slider("Depth (hops)", 1, MAX_DEPTH, 1)
+        with stage("query", query="ego", depth=depth) as info:
+            hood, truncated = kb.graph.ego([centre], depth, node_limit)
+            info["rows"] = len(hood)
+        included_nodes = list(hood["id"])
+        heading = f"Within {depth} hop(s) of {labels.get(centre) or centre}"
+    elif query == "Shortest path":
+        from_col, to_col = st.columns(2)
+        source = from_col.selectbox("From", node_options, format_func=entity_label)
+        target = to_col.selectbox("To", node_options, index=min(1, len(node_options) - 1), format_func=entity_label)
+        with stage("query", query="shortest_path") as info:
+            included_nodes = kb.graph.shortest_path(source, target)
+            info["rows"] = len(included_nodes)
+        heading = " → ".join(labels.get(n) or n for n in included_nodes) or "No path between these entities"
+    else:
+        project = st.selectbox("Project", kb.graph.projects())
+        depth = st.slider("Also include neighbours up to (hops)", 0, MAX_DEPTH, 0)
+        with stage("query", query="project", depth=depth) as info:
+            members, truncated = kb.graph.project(project or "", depth, node_limit)
+            info["rows"] = len(members)
+        included_nodes = list(members["id"])
+        heading = f"Entities connected to {project}"
+
+    if truncated:
+        st.info(f"Result capped at {node_limit} nodes (best-connected nodes kept at the last hop).")
+
+    # === Render through the shared graph component ===
+    if included_nodes:
+        with stage("graph_assembly") as info:
+            edges_df = kb.edges.select(included_nodes, how="both")
+            nodes = entity_nodes(kb.entities, included_nodes, SIZE_METRICS[size_by], COLOUR_FIELDS[colour_by])
+            graph_edges = [{"source": source, "target": target, "label": label, "title": desc}
+                           for source, target, label, desc in
+                           edges_df[["source", "target", "relationship_type", "description"]].itertuples(index=False, name=None)]
+            info.update(nodes=len(nodes), edges=len(graph_edges))
+
+        st.markdown(f"### {heading} ({len(nodes)} nodes, {len(graph_edges)} edges)")
+        render_graph(nodes, graph_edges, layout_mode=LAYOUT_MODES[layout_choice])
+    else:
+        st.warning(heading if query == "Shortest path" else "No matching entities found.")
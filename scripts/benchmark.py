@@ -0,0 +1,247 @@
+# benchmark.py: time and measure each stage of the pipeline on a synthetic corpus
+# Stages: ingest (YAML parse), index build (full + no-op incremental), knowledge
+# base load, Parquet export, filters/search/facet counts, timeline lookups, graph
+# assembly and render payload. Correctness checks ride along (plain pandas can read
+# the index and the export; graph renders stay within the node budget). Results
+# are appended to benchmarks/results.jsonl and compared against the last run with
+# the same corpus parameters on the same host, so regressions show up as hard
+# numbers.
+#
+#   python scripts/benchmark.py --entities 10000
+#   python scripts/benchmark.py --entities 100000 --fail-on-regression
+
+import sys
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from generate_corpus import generate_corpus
+from kb.clusters import CLUSTER_FIELDS, cluster_graph, cluster_labels, top_nodes
+from kb.export import export_file
+from kb.facets import FACETS
+from kb.index_builder import build_index, scan_data_dir
+from kb.ingest import parse_files
+from kb.paths import DUCKDB_FILE, PARQUET_FILE
+from kb.query import filter_entities
+from kb.render import build_payload, entity_nodes
+from kb.store import load_knowledge_base
+from kb.temporal import to_day
+
+RESULTS_FILE = ROOT / "benchmarks" / "results.jsonl"
+# A stage regresses when it is this much slower than the baseline (and by > MIN_DELTA s)
+TOLERANCE = 0.25
+MIN_DELTA = 0.05
+# Timed for the record but not part of the pipeline (disk-bound, noisy)
+SETUP_STAGES = {"generate"}
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc), else the peak from getrusage"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Recorder:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage; yields a dict the stage can put row counts etc. into"""
+        info = {}
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield info
+        finally:
+            info["seconds"] = round(time.perf_counter() - started, 4)
+            info["rss_mb"] = round(rss_mb(), 1)
+            if self.trace_memory:
+                info["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+                tracemalloc.stop()
+            self.stages[name] = info
+            extra = " ".join(f"{k}={v}" for k, v in info.items() if k != "seconds")
+            print(f"  {name:<16} {info['seconds']:>9.3f}s  {extra}")
+
+
+def check(ok: bool, message: str):
+    """Correctness checks riding along with the timings: a failure aborts the run"""
+    if not ok:
+        raise SystemExit(f"CHECK FAILED: {message}")
+
+
+def run_stages(data_dir: Path, rec: Recorder, workers: int = None, budget: int = 300):
+    with rec.stage("ingest") as info:
+        records, errors = parse_files(scan_data_dir(data_dir), workers=workers)
+        info.update(files=len(records), errors=len(errors))
+    del records
+
+    with rec.stage("build") as info:
+        result = build_index(data_dir, force=True, workers=workers)
+        info["version"] = result.version
+    with rec.stage("build_noop") as info:
+        info["dirty"] = build_index(data_dir, workers=workers).dirty
+
+    with rec.stage("load") as info:
+        kb = load_knowledge_base(data_dir, result.version)
+        info.update(entities=len(kb.entities), edges=len(kb.edges.edges))
+
+    with rec.stage("export") as info, tempfile.TemporaryDirectory(prefix="kb-export-") as export_dir:
+        path = export_file(lambda: kb.entities, result.version, "Parquet", export_dir=Path(export_dir))
+        # Plain pandas (no ArrowDtype-aware reader) must open both the index and the export
+        for name, table in (("index", data_dir / PARQUET_FILE.name), ("export", path)):
+            frame = pd.read_parquet(table)
+            check(len(frame) == len(kb.entities) and frame["id"].tolist() == kb.entities["id"].tolist(),
+                  f"pd.read_parquet round trip of the {name}")
+        info["bytes"] = path.stat().st_size
+
+    db = data_dir / DUCKDB_FILE.name
+    with rec.stage("filter") as info:
+        info["rows"] = len(filter_entities(search="council", path=db))
+    with rec.stage("search") as info:
+        info["rows"] = len(kb.search.search("safeguarding hub"))
+    with rec.stage("facets") as info:
+        selected = {"folder": ["organizations"], "region": ["North West"]}
+        counts = {column: kb.facets.counts(column, selected) for column in FACETS.values()}
+        info.update(rows=len(kb.facets.rows(selected)), values=sum(len(c) for c in counts.values()))
+    with rec.stage("temporal") as info:
+        day = to_day(date(2020, 6, 1))
+        entities, edges = kb.temporal.entities.active(day), kb.temporal.edges.active(day)
+        info.update(entities=len(entities), edges=len(edges), people=len(kb.temporal.people_on(day)))
+    with rec.stage("relationships") as info:
+        info["rows"] = len(kb.relationships.filter(search="council"))
+
+    with rec.stage("graph_assembly") as info:
+        shown = top_nodes(kb.entities, budget)
+        nodes = entity_nodes(shown, set(shown["id"]))
+        edges_df = kb.edges.select(shown["id"], how="both")
+        edges = [{"source": s, "target": t, "label": label, "title": desc} for s, t, label, desc in
+                 edges_df[["source", "target", "relationship_type", "description"]].itertuples(index=False)]
+        info.update(nodes=len(nodes), edges=len(edges))
+    with rec.stage("clustering") as info:
+        cluster_nodes, cluster_edges, _ = cluster_graph(kb.entities, kb.edges.edges, "type", budget=budget)
+        info.update(nodes=len(cluster_nodes), edges=len(cluster_edges))
+    # Many tiny clusters (communities), with and without one expanded, stay within budget
+    for field in CLUSTER_FIELDS.values():
+        labels = cluster_labels(kb.entities, field)
+        for expanded in ((), (labels.value_counts().index[0],)):
+            bounded, _, _ = cluster_graph(kb.entities, kb.edges.edges, field, expanded, budget=budget)
+            check(len(bounded) <= budget, f"{len(bounded)} cluster nodes by {field} over a budget of {budget}")
+    with rec.stage("ego_query") as info:
+        hood, _ = kb.graph.ego(shown["id"].head(1), depth=2)
+        info["nodes"] = len(hood)
+
+    with rec.stage("render_payload") as info:
+        info["bytes"] = len(json.dumps(build_payload(nodes, edges), default=str))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_baseline(path: Path, corpus: dict, host: str):
+    """Most recent recorded run over the same corpus parameters on this host"""
+    if not path.exists():
+        return None
+    baseline = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            run = json.loads(line)
+            if run.get("corpus") == corpus and run.get("host") == host:
+                baseline = run
+    return baseline
+
+
+def regressions(stages: dict, baseline: dict) -> list:
+    out = []
+    for name, info in stages.items():
+        base = baseline["stages"].get(name)
+        if not base or name in SETUP_STAGES:
+            continue
+        delta = info["seconds"] - base["seconds"]
+        if delta > MIN_DELTA and info["seconds"] > base["seconds"] * (1 + TOLERANCE):
+            out.append(f"{name}: {base['seconds']:.3f}s → {info['seconds']:.3f}s")
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the indexing and rendering pipeline")
+    parser.add_argument("--data-dir", type=Path, help="benchmark an existing tree instead of generating one (its index files get rebuilt)")
+    parser.add_argument("--entities", type=int, default=10000, help="synthetic entities to generate")
+    parser.add_argument("--avg-degree", type=float, default=3.0)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: one per core)")
+    parser.add_argument("--budget", type=int, default=300, help="node budget for graph stages")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record peak Python allocations per stage (tracemalloc; slows stages)")
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE, help="JSON-lines file to append to")
+    parser.add_argument("--no-record", action="store_true", help="don't append this run to the results")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    rec = Recorder(args.trace_memory)
+    with tempfile.TemporaryDirectory(prefix="kb-bench-") as tmp:
+        if args.data_dir:
+            data_dir = args.data_dir
+            corpus = {"data_dir": str(args.data_dir.resolve())}
+        else:
+            data_dir = Path(tmp) / "data"
+            corpus = {"entities": args.entities, "avg_degree": args.avg_degree, "skew": args.skew,
+                      "seed": args.seed}
+            print(f"Generating {args.entities} entities...")
+            with rec.stage("generate") as info:
+                info.update(generate_corpus(data_dir, args.entities, args.avg_degree, args.skew, args.seed))
+        print("Stages:")
+        run_stages(data_dir, rec, args.workers, args.budget)
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "corpus": corpus,
+        "stages": rec.stages,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    baseline = load_baseline(args.results, corpus, run["host"])
+    slower = regressions(rec.stages, baseline) if baseline else []
+    if baseline:
+        print(f"Compared with {baseline['commit'] or 'unknown commit'} ({baseline['timestamp']}):")
+        print("\n".join(f"  REGRESSION {line}" for line in slower) or "  no regressions")
+
+    if not args.no_record:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, default=str) + "\n")
+        print(f"Recorded in {args.results}")
+
+    sys.exit(1 if slower and args.fail_on_regression else 0)
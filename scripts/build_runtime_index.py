@@ -1,61 +1,39 @@
-
 # build_runtime_index.py updated for SCCM-aligned folders
+# Incremental: only YAMLs added/changed since the last build are reparsed
+# (see app/kb/index_builder.py for the manifest logic)
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
 
-import os
-import yaml
-import duckdb
 import pandas as pd
 
-# SCCM folder to @type mapping
-FOLDER_TYPE_MAP = {
-    "organizations": "ORGANIZATION",
-    "services": "SERVICE",
-    "plans": "PLAN",
-    "events": "EVENT",
-    "collections": "COLLECTION",
-    "items": "ITEM",
-    "resources": "RESOURCE",
-    "relationships": "RELATIONSHIP"
-}
-
-index_records = []
-
-for folder, type_value in FOLDER_TYPE_MAP.items():
-    folder_path = os.path.join("data", folder)
-    if not os.path.isdir(folder_path):
-        continue
-
-    for file in os.listdir(folder_path):
-        if file.endswith(".yaml"):
-            full_path = os.path.join(folder_path, file)
-            with open(full_path, "r") as f:
-                try:
-                    data = yaml.safe_load(f)
-                except Exception as e:
-                    print(f"Error loading {full_path}: {e}")
-                    continue
-
-            index_records.append({
-                "file_path": full_path,
-                "folder": folder,
-                "filename": file,
-                "name": data.get("name", file.replace(".yaml", "")),
-                "@type": data.get("@type", type_value),
-                "subtype": data.get("subtype", ""),
-                "tags": ", ".join(data.get("tags", [])),
-                "organisation": data.get("organisation", ""),
-                "region": data.get("region", ""),
-                "projects": ", ".join(data.get("projects", [])) if data.get("projects") else ""
-            })
+from kb.export import write_export
+from kb.index_builder import build_index, read_table
+from kb.paths import DATA_DIR, PARQUET_FILE, DUCKDB_FILE, UNRESOLVED_REFS_FILE
 
-# Write to CSV
-index_df = pd.DataFrame(index_records)
-index_df.to_csv("index_data.csv", index=False)
+parser = argparse.ArgumentParser(description="Rebuild the runtime index from data/ YAMLs")
+parser.add_argument("--force", action="store_true", help="ignore the manifest and reparse every file")
+parser.add_argument("--workers", type=int, default=None,
+                    help="YAML parser processes (default: KB_INGEST_WORKERS or one per core)")
+args = parser.parse_args()
+
+result = build_index(DATA_DIR, force=args.force, workers=args.workers)
 
-# Save to DuckDB
-db_path = "index.db"
-con = duckdb.connect(db_path)
-con.execute("DROP TABLE IF EXISTS index_data")
-con.execute("CREATE TABLE index_data AS SELECT * FROM index_df")
+for path, err in result.errors.items():
+    print(f"Error loading {path}: {err}")
+
+print(f"added={len(result.added)} changed={len(result.changed)} removed={len(result.removed)}")
+
+# References (lead_organisation, collaborators, projects, organisation) that matched no entity
+unresolved = pd.read_parquet(UNRESOLVED_REFS_FILE)
+for ref in unresolved.itertuples(index=False):
+    print(f"Unresolved {ref.field} '{ref.ref}' in {ref.file_path}")
+
+# Write to CSV
+index_df = read_table(PARQUET_FILE)
+write_export(index_df, Path("index_data.csv"), "CSV")
 
-print("✅ DuckDB + CSV index rebuilt using SCCM folder structure")
+print(f"✅ DuckDB ({DUCKDB_FILE.name}) + Parquet index at version {result.version}")
@@ -0,0 +1,228 @@
+# generate_corpus.py: synthetic SCCM-shaped data trees for load testing
+# Writes organizations/, services/, plans/, events/ and relationships/ YAMLs in the
+# same shape as data/, with a configurable (power-law) degree distribution so the
+# indexer, filters and graph pages can be exercised at national scale. Organisations
+# get dated `persons` and about half the relationships from/to dates, for the timeline.
+#
+#   python scripts/generate_corpus.py --out /tmp/kb-50k --entities 50000
+#
+# An existing --out is only replaced when it is empty or was written by this script
+# (it leaves a .generated-corpus marker), or with --force. The repository's data/,
+# the working directory and their parents are never replaced.
+
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+MARKER = ".generated-corpus"
+
+REGIONS = [
+    "North East", "North West", "Yorkshire and the Humber", "East Midlands", "West Midlands",
+    "East of England", "London", "South East", "South West", "England",
+]
+PLACES = [
+    "Essex", "Knowsley", "Hertfordshire", "Kent", "Leeds", "Bristol", "Cumbria", "Devon", "Norfolk",
+    "Suffolk", "Lancashire", "Surrey", "Camden", "Hackney", "Wigan", "Sefton", "Dorset", "Wirral",
+    "Derby", "Nottingham", "Coventry", "Sheffield", "Durham", "Bolton", "Oxford", "Luton", "Halton",
+]
+ORG_KINDS = [
+    ("County Council", "Local Authority"), ("Borough Council", "Local Authority"),
+    ("City Council", "Local Authority"), ("University", "University"),
+    ("Children's Trust", "Charity"), ("Family Support", "Voluntary Sector"),
+    ("Health Partnership", "Health Organisation"), ("Police", "Police Force"),
+    ("Data Cooperative", "Research Partnership"), ("Analytics Ltd", "Technology Provider"),
+    ("Advisory", "Consultancy"), ("Foundation", "Funder"),
+]
+TOPICS = [
+    "Safeguarding", "Early Help", "Fostering", "Adoption", "Care Leavers", "Youth Justice",
+    "Placements", "Family Hubs", "Data Standards", "Workforce", "SEND", "Edge of Care",
+]
+SERVICE_KINDS = ["Service", "Dataset", "Toolkit", "Dashboard", "Hub"]
+PLAN_KINDS = ["Programme", "Pilot", "Fund", "Partnership", "Strategy"]
+EVENT_KINDS = ["Review", "Conference", "Inspection", "Workshop", "Consultation"]
+TAGS = [
+    "safeguarding", "data-standard", "local-authority", "children-services", "ssd", "d2i",
+    "early-help", "fostering", "placements", "workforce", "analytics", "policy", "funding",
+]
+RELATIONSHIP_TYPES = ["collaboratesWith", "funds", "commissions", "supplies", "partnersWith", "reportsTo"]
+PEOPLE = ["Alex", "Sam", "Jo", "Priya", "Tom", "Aisha", "Chris", "Mei", "Owen", "Fatima"]
+ROLES = ["Director", "Data Manager", "Analyst", "Strategic Lead", "Researcher", "Project Manager"]
+
+# Share of entities per folder (relationships are sized separately from the degree)
+MIX = {"organizations": 0.55, "services": 0.2, "plans": 0.15, "events": 0.1}
+
+
+def _slug(text: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in text.lower()).strip("_").replace("__", "_")
+
+
+def _quote(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _list(values) -> str:
+    return "".join(f"\n  - {v}" for v in values)
+
+
+def endpoint_weights(n: int, skew: float, rng) -> np.ndarray:
+    """Selection probability per entity: Zipf-like rank^-skew in random order (skew 0 = uniform)"""
+    weights = np.arange(1, n + 1, dtype=float) ** -skew
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def check_replaceable(out_dir: Path, force: bool = False):
+    """Raise ValueError unless out_dir may be deleted and regenerated"""
+    target = Path(out_dir).resolve()
+    for protected in (ROOT / "data", Path.cwd()):
+        protected = protected.resolve()
+        if target == protected or target in protected.parents:
+            raise ValueError(f"refusing to replace {target}: it is (or contains) {protected}")
+    if force or not target.exists():
+        return
+    if not target.is_dir():
+        raise ValueError(f"refusing to replace {target}: not a directory")
+    if any(target.iterdir()) and not (target / MARKER).exists():
+        raise ValueError(f"refusing to replace {target}: not empty and not a generated corpus "
+                         f"(no {MARKER}); pass --force to replace it anyway")
+
+
+def generate_corpus(out_dir: Path, entities: int = 1000, avg_degree: float = 3.0, skew: float = 1.0,
+                    seed: int = 0, clean: bool = True, force: bool = False) -> dict:
+    """Write a synthetic tree to out_dir; returns files written per folder.
+
+    clean replaces an existing out_dir, subject to check_replaceable (force skips the
+    marker check, never the protected directories).
+    """
+    rng = np.random.default_rng(seed)
+    # Dates come from their own stream so the rest of the corpus is unchanged for a seed
+    date_rng = np.random.default_rng([seed, 1])
+    out_dir = Path(out_dir)
+    if clean:
+        check_replaceable(out_dir, force)
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+    for folder in [*MIX, "relationships"]:
+        (out_dir / folder).mkdir(parents=True, exist_ok=True)
+    (out_dir / MARKER).touch()
+
+    counts = {folder: max(1, int(entities * share)) for folder, share in MIX.items()}
+    ids = {folder: [] for folder in MIX}
+    names, subtypes = {}, {}
+
+    def new_id(folder: str, name: str) -> str:
+        entity_id = f"{_slug(name)}_{len(ids[folder])}"
+        ids[folder].append(entity_id)
+        names[entity_id] = name
+        return entity_id
+
+    for _ in range(counts["organizations"]):
+        place = PLACES[rng.integers(len(PLACES))]
+        kind, subtype = ORG_KINDS[rng.integers(len(ORG_KINDS))]
+        subtypes[new_id("organizations", f"{place} {kind}")] = subtype
+    for folder, kinds in (("services", SERVICE_KINDS), ("plans", PLAN_KINDS), ("events", EVENT_KINDS)):
+        for _ in range(counts[folder]):
+            topic = TOPICS[rng.integers(len(TOPICS))]
+            new_id(folder, f"{topic} {kinds[rng.integers(len(kinds))]}")
+
+    orgs = np.array(ids["organizations"])
+    projects = np.array(ids["services"] + ids["plans"])
+
+    def tags() -> str:
+        return _list(rng.choice(TAGS, size=rng.integers(1, 4), replace=False))
+
+    def region() -> str:
+        return REGIONS[rng.integers(len(REGIONS))]
+
+    def span(prefix: str = "") -> str:
+        """from (and for about half, to) lines: year-month dates 2010-2025"""
+        start = int(date_rng.integers(2010, 2026)) * 12 + int(date_rng.integers(12))
+        lines = f"{prefix}from: {start // 12}-{start % 12 + 1:02d}-01\n"
+        if date_rng.random() < 0.5:
+            end = start + int(date_rng.integers(6, 72))
+            lines += f"{prefix}to: {end // 12}-{end % 12 + 1:02d}-01\n"
+        return lines
+
+    def persons() -> str:
+        people = ""
+        for _ in range(int(date_rng.integers(0, 4))):
+            person = f"{PEOPLE[date_rng.integers(len(PEOPLE))]} {int(date_rng.integers(1000))}"
+            people += f"  - name: {person}\n    role: {ROLES[date_rng.integers(len(ROLES))]}\n" + span("    ")
+        return f"persons:\n{people}" if people else ""
+
+    for i, entity_id in enumerate(ids["organizations"]):
+        org_projects = np.unique(projects[rng.integers(len(projects), size=rng.integers(0, 3))])
+        body = (f"'@type': ORGANIZATION\nname: {_quote(names[entity_id])}\nsubtype: {subtypes[entity_id]}\n"
+                f"region: {region()}\ntags:{tags()}\n")
+        if len(org_projects):
+            body += f"projects:{_list(org_projects)}\n"
+        body += persons()
+        body += f"notes: Synthetic organisation {i} for load testing.\n"
+        (out_dir / "organizations" / f"{entity_id}.yaml").write_text(body, encoding="utf-8")
+
+    # Leads/collaborators drawn up front by weight (one vectorised draw, not one per file)
+    n_led = counts["services"] + counts["plans"] + counts["events"]
+    org_weights = endpoint_weights(len(orgs), skew, rng)
+    leads = iter(orgs[rng.choice(len(orgs), size=n_led, p=org_weights)])
+    collaborator_pool = iter(orgs[rng.choice(len(orgs), size=n_led * 4, p=org_weights)])
+    for folder in ("services", "plans", "events"):
+        for entity_id in ids[folder]:
+            lead = next(leads)
+            collaborators = sorted({next(collaborator_pool) for _ in range(4)}
+                                   - {lead})[:rng.integers(0, 5)]
+            year = int(rng.integers(2015, 2026))
+            body = (f"'@type': SERVICE\nname: {_quote(names[entity_id])}\n"
+                    f"description: Synthetic {folder[:-1]} led by {names[lead]}.\n"
+                    f"lead_organisation: {lead}\nregion: {region()}\ntags:{tags()}\n"
+                    f"start_date: {year}-{int(rng.integers(1, 13)):02d}-01\n")
+            if collaborators:
+                body += f"collaborators:{_list(collaborators)}\n"
+            (out_dir / folder / f"{entity_id}.yaml").write_text(body, encoding="utf-8")
+
+    # Relationships: endpoints drawn by weight, so a few hubs collect most edges
+    all_ids = np.array([i for folder in MIX for i in ids[folder]])
+    weights = endpoint_weights(len(all_ids), skew, rng)
+    n_rels = int(len(all_ids) * avg_degree / 2)
+    sources = rng.choice(len(all_ids), size=n_rels, p=weights)
+    targets = rng.choice(len(all_ids), size=n_rels, p=weights)
+    written = 0
+    seen = set()
+    for s, t in zip(sources, targets):
+        if s == t or (s, t) in seen:
+            continue
+        seen.add((s, t))
+        source, target = all_ids[s], all_ids[t]
+        rel_type = RELATIONSHIP_TYPES[rng.integers(len(RELATIONSHIP_TYPES))]
+        body = (f"'@type': RELATIONSHIP\nname: {_quote(f'{names[source]} – {names[target]}')}\n"
+                f"source: {source}\ntarget: {target}\nrelationship_type: {rel_type}\n"
+                f"description: Synthetic {rel_type} relationship.\ntags:{tags()}\n")
+        if date_rng.random() < 0.5:
+            body += span()
+        (out_dir / "relationships" / f"{source}__{target}.yaml").write_text(body, encoding="utf-8")
+        written += 1
+
+    return {**{folder: len(v) for folder, v in ids.items()}, "relationships": written}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic SCCM-shaped data tree")
+    parser.add_argument("--out", type=Path, required=True,
+                        help="directory to write (replaced if it holds an earlier generated corpus)")
+    parser.add_argument("--entities", type=int, default=1000, help="entities excluding relationships")
+    parser.add_argument("--avg-degree", type=float, default=3.0, help="mean relationships per entity")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="power-law exponent of the degree distribution (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true",
+                        help="replace --out even if it is not a generated corpus (never data/ or the cwd)")
+    args = parser.parse_args()
+
+    try:
+        written = generate_corpus(args.out, args.entities, args.avg_degree, args.skew, args.seed,
+                                  force=args.force)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(", ".join(f"{folder}={count}" for folder, count in written.items()))
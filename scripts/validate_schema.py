@@ -1,83 +1,43 @@
-import os
-import yaml
-from cerberus import Validator
-
-# Define controlled subtype lists
-VALID_ORG_SUBTYPES = {
-    "Local Authority",
-    "Government Department",
-    "Research Partnership",
-    "University",
-    "Charity",
-    "Consultancy",
-    "Inspection Body",
-    "Health Organisation",
-    "Police Force",
-    "Voluntary Sector",
-    "Technology Provider",
-    "Funder"
-}
-
-VALID_PERSON_SUBTYPES = {
-    "DCS",
-    "Consultant",
-    "Practitioner",
-    "Academic",
-    "Analyst",
-    "Service Lead",
-    "Policy Advisor",
-    "Director",
-    "Programme Manager",
-    "Data Specialist",
-    "Commissioner",
-    "Inspector"
-}
-
-# Base schema (used by cerberus, not SCCM strict)
-schema = {
-    '@type': {'type': 'string', 'required': True, 'allowed': ['AGENT', 'SERVICE', 'PERSON', 'ORGANIZATION']},
-    'name': {'type': 'string', 'required': True},
-    'subtype': {'type': 'string', 'required': False},
-    'organisation': {'type': 'string', 'required': False},
-    'projects': {'type': 'list', 'schema': {'type': 'string'}, 'required': False},
-    'tags': {'type': 'list', 'schema': {'type': 'string'}, 'required': False},
-    'region': {'type': 'string', 'required': False},
-    'description': {'type': 'string', 'required': False},
-    'notes': {'type': 'string', 'required': False},
-    'role': {'type': 'string', 'required': False},
-}
-
-def validate_yaml_file(filepath):
-    with open(filepath, 'r') as f:
-        data = yaml.safe_load(f)
-
-    v = Validator(schema)
-    if not v.validate(data):
-        print(f"{filepath} has schema validation errors:")
-        print(v.errors)
-        return
-
-    # SCCM-aligned subtype check
-    entry_type = data.get('@type')
-    subtype = data.get('subtype')
-
-    if entry_type == "ORGANIZATION":
-        if not subtype:
-            print(f"{filepath}: Missing required 'subtype' for ORGANIZATION")
-        elif subtype not in VALID_ORG_SUBTYPES:
-            print(f"{filepath}: Invalid ORGANIZATION subtype '{subtype}'. Must be one of: {sorted(VALID_ORG_SUBTYPES)}")
-
-    if entry_type == "PERSON":
-        if not subtype:
-            print(f"{filepath}: Missing recommended 'subtype' for PERSON")
-        elif subtype not in VALID_PERSON_SUBTYPES:
-            print(f"{filepath}: Invalid PERSON subtype '{subtype}'. Must be one of: {sorted(VALID_PERSON_SUBTYPES)}")
-
-    else:
-        print(f"{filepath} is valid")
-
-if __name__ == "__main__":
-    for root, _, files in os.walk("data"):
-        for file in files:
-            if file.endswith(".yaml"):
-                validate_yaml_file(os.path.join(root, file))
+# validate_schema.py: check data/ YAMLs against the per-@type schemas
+# Parallel and incremental (unchanged files reuse cached results, see
+# app/kb/validation.py); exits non-zero on errors so it can gate pre-commit/CI.
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from kb.paths import DATA_DIR
+from kb.validation import validate_tree
+
+parser = argparse.ArgumentParser(description="Validate data/ YAMLs against the SCCM-aligned schemas")
+parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="tree to validate (default: data/)")
+parser.add_argument("--workers", type=int, default=None,
+                    help="validator processes (default: KB_INGEST_WORKERS or one per core)")
+parser.add_argument("--no-cache", action="store_true", help="revalidate every file, ignoring cached results")
+parser.add_argument("--json", type=Path, metavar="PATH", help="write a JSON report to PATH")
+parser.add_argument("--junit", type=Path, metavar="PATH", help="write a JUnit XML report to PATH")
+parser.add_argument("--verbose", action="store_true", help="also list files without issues")
+args = parser.parse_args()
+
+report = validate_tree(args.data_dir, workers=args.workers, use_cache=not args.no_cache)
+
+for rel_path, issues in sorted(report.files.items()):
+    if not issues:
+        if args.verbose:
+            print(f"{rel_path} is valid")
+        continue
+    for issue in issues:
+        field = f" [{issue['field']}]" if issue["field"] else ""
+        print(f"{rel_path}: {issue['level']}{field}: {issue['message']}")
+
+if args.json:
+    import json
+    args.json.write_text(json.dumps(report.to_json(), indent=2), encoding="utf-8")
+if args.junit:
+    args.junit.write_text(report.to_junit(), encoding="utf-8")
+
+print(f"{len(report.files)} files ({report.checked} checked, {report.cached} cached): "
+      f"{report.count('error')} errors, {report.count('warning')} warnings in {report.seconds:.2f}s")
+sys.exit(0 if report.ok else 1)